@@ -0,0 +1,240 @@
+import argparse
+import csv
+import json
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from browser_pool import install_thread_pool, close_thread_pool
+from http_fetch import close_http_fetcher
+from sharding import close_shard_executors
+from checkpoint import CheckpointStore
+from main import SCRAPER_CLASSES, clean_reviews, set_host_concurrency, set_host_rate, parse_sources
+from output import json_serial
+from store import ReviewStore
+from page_cache import PageCache
+from resolution_cache import ResolutionCache
+from metrics import get_metrics
+
+
+def load_companies(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads the company list. Accepts CSV (header row with at least a 'company'
+    column) or JSONL (one object per line with a 'company' key). Optional
+    per-row keys: source, start_date, end_date.
+    """
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(".jsonl") or path.endswith(".ndjson"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    rows.append(json.loads(line))
+        else:
+            rows.extend(csv.DictReader(f))
+    return [r for r in rows if r.get("company")]
+
+
+def build_jobs(rows: List[Dict[str, Any]], default_source: str, default_start: str, default_end: str) -> List[Dict[str, str]]:
+    """Expands each company row into one job per (company, source)."""
+    jobs = []
+    for row in rows:
+        source = row.get("source") or default_source
+        sources = list(SCRAPER_CLASSES) if source == "all" else [source]
+        for name in sources:
+            if name not in SCRAPER_CLASSES:
+                print(f"Skipping unknown source '{name}' for {row['company']}")
+                continue
+            jobs.append({
+                "company": row["company"],
+                "source": name,
+                "start_date": row.get("start_date") or default_start,
+                "end_date": row.get("end_date") or default_end,
+            })
+    return jobs
+
+
+def safe_filename(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_") or "company"
+
+
+def _init_worker(headless: bool, max_pages_per_context: int):
+    """Process initializer: one long-lived browser per worker process."""
+    install_thread_pool(headless=headless, max_pages_per_context=max_pages_per_context)
+    # Runs when the worker process exits, which atexit handlers would not.
+    Finalize(None, close_thread_pool, exitpriority=10)
+    Finalize(None, close_http_fetcher, exitpriority=10)
+    Finalize(None, close_shard_executors, exitpriority=10)
+
+
+def run_job(job: Dict[str, str], output_dir: str, headless: bool, fast: bool = False,
+            parser: str = "auto", store_path: Optional[str] = None, incremental: bool = False,
+            cache_path: Optional[str] = None, resolution_path: Optional[str] = None,
+            structured: bool = False, shards: int = 1, host_concurrency: int = 4,
+            parse_workers: int = 0, http: bool = False, host_rate: float = 0.5,
+            checkpoint_dir: str = ".checkpoints") -> Dict[str, Any]:
+    """
+    Scrapes one (company, source) job in a worker process and writes its
+    result file. A crawl that stopped on an error (it leaves its checkpoint
+    behind) is reported as failed, with whatever reviews it collected.
+    """
+    started = time.time()
+    summary = dict(job)
+    # A worker runs one job at a time, so the process-wide registry is this job's
+    metrics = get_metrics()
+    metrics.reset()
+    set_host_concurrency(host_concurrency)
+    set_host_rate(host_rate)
+    # Each worker process opens its own connection; SQLite serializes the writes
+    store = ReviewStore(store_path) if store_path else None
+    page_cache = PageCache(cache_path) if cache_path else None
+    resolutions = ResolutionCache(resolution_path) if resolution_path else None
+    checkpoints = CheckpointStore(checkpoint_dir)
+    try:
+        start_date = datetime.strptime(job["start_date"], "%Y-%m-%d")
+        end_date = datetime.strptime(job["end_date"], "%Y-%m-%d")
+        # pool=None: the scraper picks up this process's pool from _init_worker
+        scraper = SCRAPER_CLASSES[job["source"]](headless=headless, fast=fast, parser=parser,
+                                                 store=store, incremental=incremental, page_cache=page_cache,
+                                                 resolutions=resolutions, structured=structured,
+                                                 shards=shards, parse_workers=parse_workers, http=http,
+                                                 checkpoints=checkpoints)
+        reviews = scraper.fetch_reviews(job["company"], start_date, end_date)
+        if store is not None:
+            store.add_reviews(job["company"], reviews)
+        filtered = clean_reviews(scraper, reviews, start_date, end_date)
+
+        output_path = Path(output_dir) / f"{safe_filename(job['company'])}_{job['source']}_reviews.json"
+        with open(output_path, "w", encoding='utf-8') as f:
+            json.dump(filtered, f, default=json_serial, indent=4)
+
+        summary.update(status="ok", reviews=len(filtered), output=str(output_path))
+        # Scrapers log and swallow crawl errors; an unfinished crawl keeps its checkpoint
+        if checkpoints.load(scraper.selectors.source, job["company"]) is not None:
+            summary.update(status="error", error="crawl did not finish (see the worker's log)")
+    except Exception as e:
+        summary.update(status="error", reviews=0, error=str(e), traceback=traceback.format_exc())
+    finally:
+        if store is not None:
+            store.close()
+        if page_cache is not None:
+            page_cache.close()
+        if resolutions is not None:
+            resolutions.close()
+    summary["seconds"] = round(time.time() - started, 2)
+    summary["metrics"] = metrics.to_dict()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape reviews for many companies using a pool of worker processes.")
+
+    parser.add_argument("--input", required=True, help="Company list (.csv with a 'company' column, or .jsonl).")
+    parser.add_argument("--start_date", required=True, help="Default start date in YYYY-MM-DD format.")
+    parser.add_argument("--end_date", required=True, help="Default end date in YYYY-MM-DD format.")
+    parser.add_argument("--source", default="all", choices=["g2", "capterra", "trustradius", "all"],
+                        help="Default source for rows that don't specify one.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker processes (one browser each).")
+    parser.add_argument("--output-dir", default="batch_output", help="Directory for per-job results and summary.json.")
+    parser.add_argument("--headless", action="store_true", default=True, help="Run browser in headless mode.")
+    parser.add_argument("--no-headless", action="store_false", dest="headless", help="Run browser in visible mode (debug).")
+    parser.add_argument("--fast", action="store_true",
+                        help="Block images, fonts, media and third-party hosts while loading pages.")
+    parser.add_argument("--structured", action="store_true",
+                        help="Read reviews from JSON payloads and embedded JSON-LD when present (CSS selectors as fallback).")
+    parser.add_argument("--parser", default="auto", choices=["auto", "selectolax", "lxml", "bs4"],
+                        help="HTML parser for review extraction. 'auto' uses the fastest one installed.")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Load numbered review pages (G2, TrustRadius) on this many browsers per job.")
+    parser.add_argument("--host-concurrency", type=int, default=4,
+                        help="Sharded mode: maximum browsers per worker loading pages from the same site at once.")
+    parser.add_argument("--host-rate", type=float, default=0.5,
+                        help="Requests per second each worker process sends to a site, shared by its browsers and "
+                             "shards. The limit is per process: N workers can send a site up to N times this rate.")
+    parser.add_argument("--http", default=None, metavar="SOURCES",
+                        help="Comma-separated sources (or 'all') to fetch with a pooled HTTP client where possible.")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Parse pages on this many threads per job while the browser loads the next page.")
+    parser.add_argument("--max-pages-per-context", type=int, default=50,
+                        help="Recycle the browser context after this many page loads.")
+    parser.add_argument("--store", default=None,
+                        help="SQLite database every scraped review is saved to (default reviews.db with --incremental).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch reviews newer than the newest one in the store for each job.")
+    parser.add_argument("--page-cache", default=None,
+                        help="Keep the raw HTML of every parsed page in this compressed cache file (replay with main.py --replay).")
+    parser.add_argument("--resolution-cache", default="resolutions.db",
+                        help="File caching each company's product URL per source, shared by all workers ('' to disable).")
+    parser.add_argument("--checkpoint-dir", default=".checkpoints",
+                        help="Directory for per-job crawl checkpoints (an unfinished crawl leaves one behind).")
+    parser.add_argument("--refresh-resolution", action="store_true",
+                        help="Ignore cached product URLs for the listed companies and resolve them again.")
+
+    args = parser.parse_args()
+    if args.host_rate <= 0:
+        print("Error: --host-rate must be positive.")
+        return
+
+    jobs = build_jobs(load_companies(args.input), args.source, args.start_date, args.end_date)
+    if not jobs:
+        print("No jobs to run.")
+        return
+
+    store_path = args.store or ("reviews.db" if args.incremental else None)
+    if store_path:
+        # Create the schema once up front rather than racing in every worker
+        ReviewStore(store_path).close()
+    if args.page_cache:
+        PageCache(args.page_cache).close()
+    if args.resolution_cache:
+        resolutions = ResolutionCache(args.resolution_cache)
+        if args.refresh_resolution:
+            for job in jobs:
+                resolutions.invalidate(company=job["company"])
+        resolutions.close()
+
+    http_sources = parse_sources(args.http)
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    print(f"Running {len(jobs)} jobs on {args.workers} worker processes...")
+    if args.workers > 1:
+        print(f"Note: --host-rate is per worker; a site may receive up to {args.workers * args.host_rate:g} "
+              f"requests per second in total.")
+
+    started = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.headless, args.max_pages_per_context)) as executor:
+        futures = [executor.submit(run_job, job, args.output_dir, args.headless, args.fast, args.parser,
+                                   store_path, args.incremental, args.page_cache,
+                                   args.resolution_cache, args.structured, args.shards,
+                                   args.host_concurrency, args.parse_workers,
+                                   job["source"] in http_sources or "all" in http_sources,
+                                   args.host_rate, args.checkpoint_dir) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"[{len(results)}/{len(jobs)}] {result['company']} ({result['source']}): "
+                  f"{result['status']}, {result['reviews']} reviews in {result['seconds']}s")
+
+    summary = {
+        "jobs": len(results),
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "reviews": sum(r["reviews"] for r in results),
+        "seconds": round(time.time() - started, 2),
+        "results": results,
+    }
+    summary_path = Path(args.output_dir) / "summary.json"
+    with open(summary_path, "w", encoding='utf-8') as f:
+        json.dump(summary, f, indent=4)
+
+    print(f"\nDone: {summary['succeeded']}/{summary['jobs']} jobs succeeded, {summary['reviews']} reviews. Summary at {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+End-to-end benchmark: runs each scraper's real fetch_reviews loop (browser,
+pagination, extraction, dedup) against the local fixture server.
+
+    python benchmarks/bench_end_to_end.py --pages 20 --cards 25 --fast
+
+Needs Playwright's Chromium (`playwright install chromium`) but no network.
+With --http, G2 and TrustRadius are read with the HTTP client (needs httpx)
+and no browser is launched for them.
+"""
+import argparse
+import resource
+import sys
+import time
+from datetime import datetime
+
+from fixture_server import start_server
+from browser_pool import BrowserPool
+from scheduler import TokenBucket, get_scheduler
+from g2_scraper import G2Scraper
+from capterra_scraper import CapterraScraper
+from trustradius_scraper import TrustRadiusScraper
+
+SCRAPERS = {
+    "g2": G2Scraper,
+    "capterra": CapterraScraper,
+    "trustradius": TrustRadiusScraper,
+}
+
+
+def _peak_rss_mb() -> float:
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full scrapes against the local fixture server.")
+    parser.add_argument("--sources", default=",".join(SCRAPERS), help="Comma-separated sources.")
+    parser.add_argument("--pages", type=int, default=20, help="Review pages per source.")
+    parser.add_argument("--cards", type=int, default=25, help="Review cards per page.")
+    parser.add_argument("--parser", default="auto", help="HTML parser backend.")
+    parser.add_argument("--fast", action="store_true", help="Enable resource blocking.")
+    parser.add_argument("--http", action="store_true", help="Use HTTP fetch mode where the source supports it.")
+    parser.add_argument("--no-headless", action="store_false", dest="headless")
+    args = parser.parse_args()
+
+    server = start_server(0, args.pages, args.cards)
+    root = f"http://127.0.0.1:{server.server_address[1]}"
+    start_date, end_date = datetime(2000, 1, 1), datetime(2100, 1, 1)
+
+    print(f"{'source':<12} {'reviews':>8} {'seconds':>8} {'reviews/s':>10}")
+    with BrowserPool(headless=args.headless, max_pages_per_context=0) as pool:
+        for name in args.sources.split(","):
+            scraper = SCRAPERS[name](pool=pool, fast=args.fast, parser=args.parser, sort_newest_first=False,
+                                     http=args.http)
+            scraper.base_url = f"{root}/{name}"
+            # Point the scraper (scheduler, fast-mode allowlist) at the local host
+            scraper.domain = "127.0.0.1"
+            scraper.allowed_hosts = ("127.0.0.1",)
+            # The politeness limit would dominate a local run
+            get_scheduler(scraper.domain).bucket = TokenBucket(rate=1000, capacity=1000)
+
+            started = time.perf_counter()
+            reviews = scraper.fetch_reviews("Fixture Product", start_date, end_date)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<12} {len(reviews):>8} {elapsed:>8.2f} {len(reviews) / elapsed:>10.0f}")
+
+    print(f"\nPeak RSS (this process or browser children): {_peak_rss_mb():.1f} MB")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Microbenchmark: review extraction speed of each installed HTML parser backend
+on the saved fixture pages.
+
+    python benchmarks/bench_parsers.py --scale 50 --repeat 5
+"""
+import argparse
+import time
+
+from corpus import SOURCES, load_fixture, scale_page
+from extraction import available_parsers, extract_reviews, get_parser
+
+
+def bench(html: str, spec, parser_name: str, repeat: int):
+    parser = get_parser(parser_name)
+    best = None
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = len(extract_reviews(html, spec, parser))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parser backends on fixture review pages.")
+    parser.add_argument("--scale", type=int, default=50, help="Repeat each fixture's cards this many times.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per backend; the best time is reported.")
+    args = parser.parse_args()
+
+    backends = available_parsers()
+    print(f"Backends: {', '.join(backends)}")
+    print(f"{'source':<12} {'parser':<11} {'reviews':>8} {'best ms':>9} {'reviews/s':>11} {'vs bs4':>7}")
+
+    for source, spec in SOURCES.items():
+        html = scale_page(load_fixture(source), spec, args.scale)
+        results = {name: bench(html, spec, name, args.repeat) for name in backends}
+        baseline = results["bs4"][1]
+        for name, (count, seconds) in results.items():
+            print(f"{source:<12} {name:<11} {count:>8} {seconds * 1000:>9.1f} "
+                  f"{count / seconds:>11.0f} {baseline / seconds:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
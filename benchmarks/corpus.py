@@ -0,0 +1,57 @@
+"""Saved review pages used by the benchmarks, plus helpers to scale them up."""
+import copy
+import os
+import sys
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from g2_scraper import SELECTORS as G2_SELECTORS
+from capterra_scraper import SELECTORS as CAPTERRA_SELECTORS
+from trustradius_scraper import SELECTORS as TRUSTRADIUS_SELECTORS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SOURCES = {
+    "g2": G2_SELECTORS,
+    "capterra": CAPTERRA_SELECTORS,
+    "trustradius": TRUSTRADIUS_SELECTORS,
+}
+
+
+def load_fixture(source: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, f"{source}.html"), encoding='utf-8') as f:
+        return f.read()
+
+
+def _cards(soup: BeautifulSoup, spec) -> list:
+    for css in spec.cards:
+        cards = soup.select(css)
+        if cards:
+            return cards
+    return []
+
+
+def fixture_cards(source: str) -> List[str]:
+    """The review cards of a fixture page as standalone HTML snippets."""
+    soup = BeautifulSoup(load_fixture(source), 'html.parser')
+    return [str(card) for card in _cards(soup, SOURCES[source])]
+
+
+def scale_page(html: str, spec, factor: int) -> str:
+    """Repeats the page's review cards `factor` times to simulate a large review page."""
+    if factor <= 1:
+        return html
+    soup = BeautifulSoup(html, 'html.parser')
+    cards = _cards(soup, spec)
+    if not cards:
+        return html
+    anchor = cards[-1]
+    for _ in range(factor - 1):
+        for card in cards:
+            clone = copy.copy(card)
+            anchor.insert_after(clone)
+            anchor = clone
+    return str(soup)
@@ -0,0 +1,145 @@
+"""
+Local stand-in for G2, Capterra and TrustRadius built from the fixture cards,
+so the full fetch_reviews pagination loops can run without network access.
+
+    python benchmarks/fixture_server.py --port 8765 --pages 20 --cards 25
+
+Routes (every product slug is accepted):
+    /g2/products/<slug>/reviews?page=N             G2 pages with a Next link
+    /trustradius/products/<slug>/reviews?page=N    TrustRadius pages with a Next link
+    /capterra/search-results/?search=...           search results linking to the product
+    /capterra/p/1000/<slug>/                       product page
+    /capterra/p/1000/<slug>/reviews/               first batch plus a "Show more" button
+    /capterra/p/1000/<slug>/reviews/more?offset=N  next batch of cards (empty when done)
+"""
+import argparse
+import hashlib
+import html
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from corpus import fixture_cards
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body><main>{body}</main></body></html>"""
+
+CAPTERRA_REVIEWS = """<section class="reviews-list">{cards}</section>
+<button type="button" id="show-more">Show more</button>
+<script>
+let offset = {batch};
+document.getElementById("show-more").addEventListener("click", async () => {{
+    const response = await fetch("more?offset=" + offset);
+    const cards = await response.text();
+    if (!cards) {{ document.getElementById("show-more").remove(); return; }}
+    document.querySelector(".reviews-list").insertAdjacentHTML("beforeend", cards);
+    offset += {batch};
+}});
+</script>"""
+
+
+class FixtureSite:
+    """Generates numbered copies of the fixture cards so every review is unique."""
+
+    def __init__(self, pages: int, cards_per_page: int):
+        self.pages = pages
+        self.cards_per_page = cards_per_page
+        self.templates = {source: fixture_cards(source) for source in ("g2", "capterra", "trustradius")}
+
+    def cards(self, source: str, start: int, count: int) -> str:
+        templates = self.templates[source]
+        out = []
+        for i in range(start, min(start + count, self.pages * self.cards_per_page)):
+            card = templates[i % len(templates)]
+            # Tag the first closing quote/heading text with the review number
+            out.append(card.replace("</h3>", f" #{i}</h3>", 1))
+        return "".join(out)
+
+    def paged(self, source: str, page: int, next_html: str) -> str:
+        start = (page - 1) * self.cards_per_page
+        body = self.cards(source, start, self.cards_per_page)
+        if page < self.pages:
+            body += next_html.format(page=page + 1)
+        return PAGE.format(title=f"{source} reviews page {page}", body=body)
+
+
+def make_handler(site: FixtureSite):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_html(self, body: str, status: int = 200):
+            data = body.encode('utf-8')
+            # Content-derived ETag, so conditional requests (HTTP fetch mode) get 304s
+            etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = [p for p in url.path.split("/") if p]
+            page = int(query.get("page", ["1"])[0])
+
+            if parts[:2] == ["g2", "products"] and parts[-1] == "reviews":
+                next_html = ('<div class="pagination"><a class="pagination__named-link next" '
+                             'href="?page={page}">Next</a></div>')
+                return self.send_html(site.paged("g2", page, next_html))
+
+            if parts[:2] == ["trustradius", "products"] and parts[-1] == "reviews":
+                next_html = '<nav class="pagination"><a class="next-page" href="?page={page}">Next</a></nav>'
+                return self.send_html(site.paged("trustradius", page, next_html))
+
+            if parts[:2] == ["capterra", "search-results"]:
+                slug = html.escape(query.get("search", ["product"])[0].replace(" ", ""))
+                return self.send_html(PAGE.format(title="Search", body=f'<a href="/capterra/p/1000/{slug}/">{slug}</a>'))
+
+            if parts[:2] == ["capterra", "p"]:
+                batch = site.cards_per_page
+                if parts[-1] == "more":
+                    offset = int(query.get("offset", ["0"])[0])
+                    return self.send_html(site.cards("capterra", offset, batch))
+                if parts[-1] == "reviews":
+                    body = CAPTERRA_REVIEWS.format(cards=site.cards("capterra", 0, batch), batch=batch)
+                    return self.send_html(PAGE.format(title="Capterra reviews", body=body))
+                return self.send_html(PAGE.format(title="Capterra product", body="<h1>Product</h1>"))
+
+            self.send_html(PAGE.format(title="Not found", body="Not found"), status=404)
+
+    return Handler
+
+
+def start_server(port: int = 0, pages: int = 20, cards_per_page: int = 25) -> ThreadingHTTPServer:
+    """Starts the fixture site on a background thread. Port 0 picks a free port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(FixtureSite(pages, cards_per_page)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fixture corpus as a fake review site.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=20, help="Review pages per source.")
+    parser.add_argument("--cards", type=int, default=25, help="Review cards per page.")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.pages, args.cards)
+    print(f"Serving fixtures on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Extraction hot-path benchmark over the fixture corpus.
+
+For every source, parser backend and page size it reports reviews/sec, the
+peak RSS of the process that ran the case, and how the time splits between
+parsing the HTML, selecting fields out of the cards, and parsing dates.
+Each case runs in a fresh worker process so peak RSS isn't inherited from
+earlier, larger cases (it does include building the scaled page).
+
+    python benchmarks/run_benchmarks.py --scales 1,200,1000 --parsers all
+    python benchmarks/run_benchmarks.py --json bench_output.json
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from typing import Dict, Any
+
+from corpus import SOURCES, load_fixture, scale_page
+from dates import DateNormalizer
+from extraction import available_parsers, get_parser, extract_card
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(source: str, scale: int, parser_name: str, repeat: int) -> Dict[str, Any]:
+    spec = SOURCES[source]
+    html = scale_page(load_fixture(source), spec, scale)
+    parser = get_parser(parser_name)
+
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        doc = parser.parse(html)
+        parsed = time.perf_counter()
+
+        cards = []
+        for css in spec.cards:
+            cards = parser.select(doc, css)
+            if cards:
+                break
+        # Field selection is timed without date parsing, which gets its own phase
+        reviews = [extract_card(parser, card, spec) for card in cards]
+        selected = time.perf_counter()
+
+        # Fresh (cold) normalizer each repeat: only the page's own repeats are memoized
+        dates = DateNormalizer(spec.date_formats).parse_many([r.date for r in reviews])
+        for review, dt in zip(reviews, dates):
+            review.dt = dt
+        dated = time.perf_counter()
+
+        timings = {
+            "parse_ms": (parsed - started) * 1000,
+            "select_ms": (selected - parsed) * 1000,
+            "date_ms": (dated - selected) * 1000,
+            "total_ms": (dated - started) * 1000,
+        }
+        if best is None or timings["total_ms"] < best["total_ms"]:
+            best = timings
+
+    return {
+        "source": source,
+        "parser": parser_name,
+        "scale": scale,
+        "page_kb": round(len(html.encode('utf-8')) / 1024, 1),
+        "reviews": len(reviews),
+        "reviews_per_sec": round(len(reviews) / (best["total_ms"] / 1000)) if best["total_ms"] else 0,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        **{k: round(v, 2) for k, v in best.items()},
+    }
+
+
+def _run_case_star(args):
+    return run_case(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark review extraction over the fixture corpus.")
+    parser.add_argument("--sources", default=",".join(SOURCES), help="Comma-separated sources.")
+    parser.add_argument("--scales", default="1,200,1000",
+                        help="Comma-separated card multipliers (fixtures hold 5 cards each).")
+    parser.add_argument("--parsers", default="all", help="Comma-separated backends, or 'all' for every installed one.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is reported.")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    parsers = available_parsers() if args.parsers == "all" else args.parsers.split(",")
+    cases = [(source, int(scale), name, args.repeat)
+             for source in args.sources.split(",")
+             for scale in args.scales.split(",")
+             for name in parsers]
+
+    print(f"{'source':<12} {'parser':<11} {'reviews':>8} {'page KB':>9} {'parse ms':>9} {'select ms':>10} "
+          f"{'date ms':>8} {'reviews/s':>10} {'peak MB':>8}")
+    results = []
+    # maxtasksperchild=1: every case gets a fresh process, so peak RSS is per case
+    with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+        for result in pool.imap(_run_case_star, cases):
+            results.append(result)
+            print(f"{result['source']:<12} {result['parser']:<11} {result['reviews']:>8} {result['page_kb']:>9} "
+                  f"{result['parse_ms']:>9.1f} {result['select_ms']:>10.1f} {result['date_ms']:>8.1f} "
+                  f"{result['reviews_per_sec']:>10} {result['peak_rss_mb']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
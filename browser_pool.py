@@ -0,0 +1,227 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Optional, Sequence
+from urllib.parse import urlparse
+from playwright.sync_api import sync_playwright
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Fast mode: resource types we never need to read review text
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "imageset", "texttrack", "beacon", "ping", "csp_report"}
+
+# Fast mode: third-party hosts that are always allowed, so bot challenges can still complete
+ALWAYS_ALLOWED_HOSTS = ("challenges.cloudflare.com",)
+
+
+def _host_allowed(host: str, allowed_hosts: Sequence[str]) -> bool:
+    return any(host == allowed or host.endswith("." + allowed) for allowed in allowed_hosts)
+
+
+def make_route_handler(allowed_hosts: Sequence[str]):
+    """
+    Builds a page.route handler for fast mode: aborts heavy resource types
+    everywhere and any request to a host outside the source's allowlist.
+    """
+    allowed_hosts = tuple(allowed_hosts) + ALWAYS_ALLOWED_HOSTS
+
+    def handle(route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            return route.abort()
+        host = urlparse(request.url).hostname or ""
+        if host and not _host_allowed(host, allowed_hosts):
+            return route.abort()
+        return route.continue_()
+
+    return handle
+
+
+class BrowserSession:
+    """
+    A single job's view of the pool: one fresh BrowserContext and its page.
+    Scrapers call tick() after every page load so long crawls get their
+    context recycled before it accumulates too much state.
+
+    `navigate(page, url)` re-opens the current URL on a recycled context;
+    scrapers pass their scheduler's navigate so the reload is rate limited
+    and challenge-aware. Without it a recycled context starts blank.
+    """
+
+    def __init__(self, pool: "BrowserPool", allowed_hosts: Optional[Sequence[str]] = None,
+                 navigate: Optional[Callable] = None):
+        self.pool = pool
+        # Set in fast mode: only these hosts (and their subdomains) may load
+        self.allowed_hosts = allowed_hosts
+        self.navigate = navigate
+        # URL at the previous tick(), to tell whether pagination changes the URL
+        self._last_url = None
+        self.context = None
+        self.page = None
+        self.pages_loaded = 0
+        # Network bytes received by this session's contexts (from Content-Length)
+        self.bytes_received = 0
+        self._bytes_taken = 0
+        self._open()
+
+    def _count_bytes(self, response):
+        try:
+            self.bytes_received += int(response.headers.get("content-length") or 0)
+        except Exception:
+            pass
+
+    def _open(self):
+        self.context = self.pool.new_context()
+        if self.allowed_hosts is not None:
+            self.context.route("**/*", make_route_handler(self.allowed_hosts))
+        self.context.on("response", self._count_bytes)
+        self.page = self.context.new_page()
+        self.pages_loaded = 0
+
+    def take_bytes(self) -> int:
+        """Bytes received since the previous call (for per-page accounting)."""
+        received = self.bytes_received - self._bytes_taken
+        self._bytes_taken = self.bytes_received
+        return received
+
+    def close(self):
+        if self.context is not None:
+            try:
+                self.context.close()
+            except Exception:
+                # Context may already be gone if the browser crashed
+                pass
+            self.context = None
+            self.page = None
+
+    def tick(self):
+        """
+        Records a page load. Once the context has served max_pages_per_context
+        pages it is replaced by a fresh one, re-opened at the current URL.
+        Returns the page to keep using.
+
+        If the URL didn't change since the previous tick (pagination that
+        swaps cards in place), the current page only exists in this DOM and
+        re-opening the URL would restart at page 1, so recycling waits.
+        """
+        self.pages_loaded += 1
+        current_url = self.page.url
+        if (self.pool.max_pages_per_context and self.pages_loaded >= self.pool.max_pages_per_context
+                and current_url != self._last_url):
+            self.recycle()
+        self._last_url = self.page.url
+        return self.page
+
+    def recycle(self):
+        """Closes the current context and continues on a fresh one at the same URL."""
+        current_url = self.page.url if self.page is not None else None
+        self.close()
+        self._open()
+        if self.navigate is not None and current_url and current_url.startswith("http"):
+            self.navigate(self.page, current_url)
+        return self.page
+
+
+class BrowserPool:
+    """
+    Keeps one Chromium process alive for the whole run and hands out a fresh
+    BrowserContext per job. If the browser dies it is relaunched on the next job.
+
+    Not thread-safe: Playwright's sync API is bound to the thread that started it.
+    """
+
+    def __init__(self, headless: bool = True, max_pages_per_context: int = 50,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        self.headless = headless
+        self.max_pages_per_context = max_pages_per_context
+        self.user_agent = user_agent
+        self._playwright = None
+        self._browser = None
+
+    def start(self):
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        if self._browser is None or not self._browser.is_connected():
+            self._browser = self._playwright.chromium.launch(headless=self.headless)
+        return self
+
+    def close(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def new_context(self):
+        self.start()
+        return self._browser.new_context(user_agent=self.user_agent)
+
+    @contextmanager
+    def session(self, allowed_hosts: Optional[Sequence[str]] = None, navigate: Optional[Callable] = None):
+        """
+        Yields a BrowserSession for one scraping job. The context is always
+        closed afterwards; a crash inside the job also drops the browser if it
+        disconnected so the next job gets a working one.
+
+        Passing allowed_hosts turns on fast mode (see make_route_handler);
+        navigate is used to re-open pages on recycled contexts.
+        """
+        session = BrowserSession(self, allowed_hosts, navigate)
+        try:
+            yield session
+        finally:
+            session.close()
+            if self._browser is not None and not self._browser.is_connected():
+                self._browser = None
+
+
+# Per-thread pools for concurrent runs. Playwright's sync API can't be shared
+# across threads, so each worker thread gets its own long-lived browser.
+_thread_state = threading.local()
+
+
+def install_thread_pool(headless: bool = True, max_pages_per_context: int = 50):
+    """Executor initializer: gives the calling thread its own BrowserPool."""
+    _thread_state.pool = BrowserPool(headless=headless, max_pages_per_context=max_pages_per_context)
+
+
+def current_thread_pool() -> Optional[BrowserPool]:
+    return getattr(_thread_state, "pool", None)
+
+
+def close_thread_pool():
+    pool = current_thread_pool()
+    if pool is not None:
+        pool.close()
+        _thread_state.pool = None
+
+
+def shutdown_thread_pools(executor: ThreadPoolExecutor, workers: int):
+    """
+    Closes the browser owned by every thread of an executor started with
+    install_thread_pool, then shuts it down. Each close task blocks on a
+    barrier until all workers hold one, which guarantees one task per thread.
+    """
+    barrier = threading.Barrier(workers)
+
+    def close():
+        try:
+            close_thread_pool()
+        finally:
+            try:
+                barrier.wait(timeout=30)
+            except threading.BrokenBarrierError:
+                pass
+
+    wait([executor.submit(close) for _ in range(workers)])
+    executor.shutdown(wait=True)
@@ -1,191 +1,304 @@
-import time
 import re
 from datetime import datetime
-from typing import List, Dict, Any
-from playwright.sync_api import sync_playwright
-from scraper_base import ReviewScraper
+from typing import List, Iterator
+from scraper_base import ReviewScraper, Review
+from scheduler import PageLoadError
+from extraction import SelectorSpec
+from resolution_cache import NOT_FOUND
+from structured import extract_json_ld_blocks
+from pipeline import PageSnapshot
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
+SELECTORS = SelectorSpec(
+    source="Capterra",
+    cards=['.review-card', '[data-testid="review-card"]'],
+    title=['h3', '.review-card-title'],
+    # Might be split into Pros/Cons or General; .review-text is the fallback
+    body_all='.review-comments-text',
+    body=['.review-text'],
+    # "Written on Oct 12, 2023" or similar
+    date=['.review-date', '[data-testid="review-date"]'],
+    date_strip=["Written on"],
+    # October 12, 2023 or 12/10/2023
+    date_formats=["%B %d, %Y", "%d/%m/%Y"],
+)
+
+CARD_SELECTORS = SELECTORS.cards
+CARD_SELECTOR = SELECTORS.card_selector
+
+# Returns outerHTML of every matching card from index `start` onwards.
+NEW_CARDS_JS = "(els, start) => els.slice(start).map(e => e.outerHTML)"
+
+# Number of matching cards from index `start` onwards.
+NEW_COUNT_JS = "(els, start) => Math.max(els.length - start, 0)"
+
+# The button that appends the next batch of cards
+SHOW_MORE_SELECTOR = 'button:has-text("Show more")'
+
+# Text of every JSON-LD block on the page.
+JSON_LD_JS = "els => els.map(e => e.textContent)"
+
 class CapterraScraper(ReviewScraper):
-    def fetch_reviews(self, company_name: str, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        reviews = []
+    domain = "www.capterra.com"
+    base_url = "https://www.capterra.com"
+    sort_params = {"sort": "most_recent"}
+    allowed_hosts = ("capterra.com", "gdm-static.com")
+    selectors = SELECTORS
+
+    def iter_review_pages(self, company_name: str, start_date: datetime, end_date: datetime) -> Iterator[List[Review]]:
         print(f"[{self.__class__.__name__}] Starting search for {company_name}")
+        # Incremental runs start at the newest stored review and stop at the first known one
+        start_date, known = self.incremental_window(company_name, start_date)
+        checkpoint = self.open_checkpoint(company_name)
+        # Cards already emitted by an interrupted run; they are expanded again but not re-parsed
+        resume_cards = checkpoint.cards_processed if checkpoint is not None else 0
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            )
-            page = context.new_page()
+        with self.browser_session() as session:
+            page = session.page
 
             try:
-                # Step 1: Search for the company
-                search_url = f"https://www.capterra.com/search-results/?search={company_name}"
-                page.goto(search_url, timeout=60000)
-                page.wait_for_load_state("networkidle")
-
-                # Parse search results
-                # Selectors for search results might vary. 
-                # Usually: .search-result a (with href containing /p/)
-                # Let's try to find the first link that looks like a product page /p/
-                
-                # Wait for results to load
-                try:
-                    page.wait_for_selector('a[href*="/p/"]', timeout=10000)
-                except:
-                    print(f"No results found for {company_name} on Capterra.")
-                    return []
-
-                content = page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                product_link = None
-                for a in soup.find_all('a', href=True):
-                    if '/p/' in a['href']:
-                        product_link = a['href']
-                        break
-                
-                if not product_link:
-                    print(f"Could not identify product link for {company_name}")
-                    return []
-                
-                full_product_url = urljoin("https://www.capterra.com", product_link)
-                # Ensure we are at reviews or go to reviews
-                # Capterra URL: /p/ID/Slug/
-                # Reviews are usually lower down or we can try appending "reviews/" if acceptable, 
-                # but standard Capterra is single page app often.
-                # Actually, capturing the reviews might require clicking "Reviews" tab if it exists.
-                
-                print(f"Found product page: {full_product_url}")
-                page.goto(full_product_url, timeout=60000)
-                page.wait_for_load_state("networkidle")
-                
-                # Clicking "Reviews" if it's a tab or scrolling down.
-                # Check for "Reviews" in text to click or verify presence.
-                # Actually, some Capterra pages have /reviews/ suffix valid. Let's try navigating there directly?
-                # Format: https://www.capterra.com/p/123/Product/reviews/ ??
-                # Let's try constructing it.
-                if not full_product_url.endswith('/'):
-                    full_product_url += '/'
-                reviews_url = f"{full_product_url}reviews/"
-                
-                print(f"Navigating to reviews page: {reviews_url}")
-                response = page.goto(reviews_url)
-                
-                # If 404 or redirect back to product page, then maybe the single page view is used.
-                if response.status == 404 or page.url != reviews_url:
-                    print("Direct reviews link failed, using product page...")
-                    page.goto(full_product_url)
-                    # Scroll to reviews or click "Read all reviews"
-                    # This part is highly dynamic. For this assignment, we will attempt to find review cards.
-
-                page.wait_for_load_state("networkidle")
-                
+                if not self._open_reviews(page, company_name):
+                    return
+                # Structured mode: Show more's review API payloads are read directly
+                capture = self.response_capture(page)
+
                 # Expand all reviews if possible? Or pagination?
                 # Capterra uses "Show more" usually.
                 
-                collected_count = 0
+                # "Show more" appends cards to the same list, so only cards past
+                # processed_cards are new. They are pulled straight from the DOM
+                # instead of re-serializing and re-parsing the whole page.
+                card_selector = None
+                processed_cards = 0
+                tracker = self.crawl_tracker(start_date, known)
+
+                if self.pipelined():
+                    # Batches are parsed on worker threads while the browser clicks Show more
+                    card_selector = next((c for c in CARD_SELECTORS if page.query_selector(c)), None)
+                    if card_selector is None:
+                        print("Found 0 reviews visible.")
+                    else:
+                        if resume_cards:
+                            processed_cards = self._skip_cards(page, card_selector, resume_cards)
+                        snapshots = self._iter_batches(session, page, card_selector, processed_cards)
+                        yield from self.iter_pipelined_pages(company_name, snapshots, tracker, checkpoint,
+                                                             start_date, end_date)
+                    self.finish_checkpoint(checkpoint)
+                    return
+
                 while True:
-                    # Parse reviews
-                    content = page.content()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    review_cards = soup.select('.review-card') or soup.select('[data-testid="review-card"]')
-                    
-                    print(f"Found {len(review_cards)} reviews visible.")
-                    
-                    new_reviews_found = False
-                    
-                    for card in review_cards:
-                        try:
-                            # Extract Title
-                            title_el = card.select_one('h3') or card.select_one('.review-card-title')
-                            title = title_el.get_text(strip=True) if title_el else "No Title"
-                            
-                            # Extract Body
-                            # Might be split into Pros/Cons or General
-                            body_text = []
-                            comments = card.select('.review-comments-text')
-                            for c in comments:
-                                body_text.append(c.get_text(strip=True))
-                            
-                            description = "\n".join(body_text) if body_text else ""
-                            if not description:
-                                # Fallback
-                                body_el = card.select_one('.review-text') 
-                                description = body_el.get_text(strip=True) if body_el else ""
-
-                            # Extract Date
-                            # "Written on Oct 12, 2023" or similar
-                            date_el = card.select_one('.review-date') or card.select_one('[data-testid="review-date"]')
-                            date_str_raw = date_el.get_text(strip=True) if date_el else ""
-                            
-                            # Clean "Written on "
-                            date_str = date_str_raw.replace("Written on", "").strip()
-                            
-                            review_date = None
-                            if date_str:
-                                try:
-                                    # Format: October 12, 2023
-                                    review_date = datetime.strptime(date_str, "%B %d, %Y")
-                                except:
-                                    try:
-                                        # Format: 12/10/2023
-                                        review_date = datetime.strptime(date_str, "%d/%m/%Y")
-                                    except:
-                                        pass
-                            
-                            # Deduplicate by looking up if we already have this review title+date+desc? 
-                            # Capterra "Show more" appends to list usually.
-                            
-                            review_obj = {
-                                "source": "Capterra",
-                                "title": title,
-                                "description": description,
-                                "date": date_str,
-                                "rating": None
-                            }
-                            review_obj['_dt'] = review_date
-
-                            # Check date range
-                            if review_date:
-                                if start_date <= review_date <= end_date:
-                                    # unique check simple
-                                    if review_obj not in reviews:
-                                        reviews.append(review_obj)
-                                        new_reviews_found = True
-                            else:
-                                if review_obj not in reviews:
-                                     reviews.append(review_obj) # Add anyway if date parse fails
-
-                        except Exception as e:
-                            # print(f"Error parsing capterra review: {e}")
-                            continue
+                    if card_selector is None:
+                        for candidate in CARD_SELECTORS:
+                            if page.query_selector(candidate):
+                                card_selector = candidate
+                                break
+                        if card_selector is None:
+                            print("Found 0 reviews visible.")
+                            break
+
+                    if resume_cards and processed_cards == 0:
+                        processed_cards = self._skip_cards(page, card_selector, resume_cards)
+
+                    batch_reviews = None
+                    if capture is not None:
+                        # The Show more payload (or the page's JSON-LD for the first batch)
+                        # stands in for the new cards' markup when it covers all of them
+                        with self.metrics.timer("parse_seconds", self.domain):
+                            structured_batch = capture.drain(self.selectors)
+                            if not structured_batch and processed_cards == 0:
+                                blocks = page.eval_on_selector_all('script[type="application/ld+json"]', JSON_LD_JS)
+                                structured_batch = extract_json_ld_blocks(blocks, self.selectors)
+                        new_count = page.eval_on_selector_all(card_selector, NEW_COUNT_JS, processed_cards)
+                        # With a page cache the markup is needed anyway, for replay
+                        if structured_batch and len(structured_batch) >= new_count and self.page_cache is None:
+                            batch_reviews = structured_batch
+
+                    if batch_reviews is None:
+                        # The batch's counterpart of page.content()
+                        with self.metrics.timer("content_seconds", self.domain):
+                            new_cards_html = page.eval_on_selector_all(card_selector, NEW_CARDS_JS, processed_cards)
+                        batch_html = "".join(new_cards_html)
+                        # Cached by card offset so replay sees the batches in order
+                        if new_cards_html:
+                            self.cache_page(company_name, page.url, processed_cards, batch_html)
+                        new_count = len(new_cards_html)
+                    processed_cards += new_count
+
+                    print(f"Found {processed_cards} reviews visible ({new_count} new).")
+
+                    if not new_count:
+                        # Show more didn't append anything - end of the list
+                        break
+
+                    if batch_reviews is None:
+                        with self.metrics.timer("parse_seconds", self.domain):
+                            batch_reviews = self.extract_reviews(batch_html)
+                    # Reviews without a parsable date are kept anyway
+                    kept = self.select_page_reviews(batch_reviews, start_date, end_date)
+                    self.record_page(company_name, page.url, batch_reviews, kept, session.take_bytes())
+
+                    batch_dates = [r.dt for r in batch_reviews]
+                    # Hand this page's reviews to the caller before loading the next one
+                    if kept:
+                        yield kept
+                    self.save_checkpoint(checkpoint, page.url, kept, cards_processed=processed_cards)
+
+                    if tracker.page_is_past_window(batch_dates):
+                        print("Reached reviews older than start date; stopping.")
+                        break
+                    if tracker.page_has_known(batch_reviews):
+                        print("Reached reviews collected by an earlier run; stopping.")
+                        break
 
                     # Pagination / Show More
                     # Capterra usually has a "Show more" button
-                    show_more_btn = page.query_selector('button:has-text("Show more")')
+                    show_more_btn = page.query_selector(SHOW_MORE_SELECTOR)
                     if show_more_btn and show_more_btn.is_visible():
-                        try:
-                            show_more_btn.click()
-                            time.sleep(2) # Wait for ajax
-                            if not new_reviews_found and len(review_cards) > 50: 
-                                # If we didn't add new reviews (maybe date range passed) and we have a lot, maybe stop?
-                                # But we can't be sure they are ordered by date.
-                                pass
-                        except:
-                            break
+                        # No session.tick() here: recycling the context would
+                        # drop every review expanded so far.
+                        # Waits for the ajax-appended cards rather than a fixed sleep
+                        self._show_more(page)
                     else:
                         break
-                    
-                    # Safety break
-                    if len(reviews) > 200: 
-                        break
 
             except Exception as e:
                 print(f"An error occurred during Capterra scraping: {e}")
-            finally:
-                browser.close()
+            else:
+                self.finish_checkpoint(checkpoint)
+
+    def _iter_batches(self, session, page, card_selector: str, processed_cards: int) -> Iterator[PageSnapshot]:
+        """
+        Browser side of a pipelined crawl: the markup of each batch of new
+        cards, clicking "Show more" in between until it is gone. Load
+        failures are raised to the consumer.
+        """
+        while True:
+            with self.metrics.timer("content_seconds", self.domain):
+                new_cards_html = page.eval_on_selector_all(card_selector, NEW_CARDS_JS, processed_cards)
+            new_count = len(new_cards_html)
+            print(f"Found {processed_cards + new_count} reviews visible ({new_count} new).")
+            if not new_count:
+                return
+            yield PageSnapshot(page.url, processed_cards, "".join(new_cards_html), session.take_bytes(),
+                               processed_cards + new_count)
+            processed_cards += new_count
+
+            show_more_btn = page.query_selector(SHOW_MORE_SELECTOR)
+            if not (show_more_btn and show_more_btn.is_visible()):
+                return
+            # No session.tick(): recycling the context would drop the expanded cards
+            self._show_more(page)
+
+    def _show_more(self, page):
+        """
+        Clicks "Show more" and waits for the appended cards. Raises
+        PageLoadError if none arrive, so a failed load isn't taken for the
+        end of the list.
+        """
+        if not self.scheduler.click_and_wait(page, SHOW_MORE_SELECTOR, CARD_SELECTOR):
+            raise PageLoadError(f"Show more on {page.url} did not load new reviews")
+
+    def _skip_cards(self, page, card_selector: str, target: int) -> int:
+        """
+        Clicks "Show more" until at least `target` cards are on the page (a
+        resumed crawl can't jump into the middle of the list). Returns how many
+        cards to treat as already processed.
+        """
+        count = len(page.query_selector_all(card_selector))
+        while count < target:
+            show_more_btn = page.query_selector(SHOW_MORE_SELECTOR)
+            if not (show_more_btn and show_more_btn.is_visible()):
+                break
+            self._show_more(page)
+            count = len(page.query_selector_all(card_selector))
+        print(f"Resumed past {min(count, target)} already processed reviews.")
+        return min(count, target)
+
+    def _open_reviews(self, page, company_name: str) -> bool:
+        """
+        Navigates to the product's reviews (the /reviews/ page, or the product
+        page when that doesn't exist). A cached resolution goes straight
+        there; otherwise the product is looked up through site search and
+        the result cached. Returns False if there is no such product.
+        """
+        cached = self.cached_resolution(company_name)
+        if cached is NOT_FOUND:
+            print(f"No results found for {company_name} on Capterra (cached).")
+            return False
+        if cached:
+            print(f"Using cached product page: {cached}")
+            target = self.sorted_url(cached) if cached.endswith('/reviews/') else cached
+            response = self.scheduler.navigate(page, target, ready_selector=CARD_SELECTOR)
+            if response is not None and response.status < 400:
+                return True
+            print("Cached product page failed; searching again.")
+            self.forget_resolution(company_name)
+
+        # Step 1: Search for the company
+        search_url = f"{self.base_url}/search-results/?search={company_name}"
+        response = self.scheduler.navigate(page, search_url, ready_selector='a[href*="/p/"]')
+
+        # Parse search results
+        # Selectors for search results might vary. 
+        # Usually: .search-result a (with href containing /p/)
+        # Let's try to find the first link that looks like a product page /p/
+        
+        # Wait for results to load
+        try:
+            page.wait_for_selector('a[href*="/p/"]', timeout=10000)
+        except:
+            print(f"No results found for {company_name} on Capterra.")
+            # Only a search page that really loaded says the product doesn't exist
+            if self.loaded_ok(page, response):
+                self.remember_resolution(company_name, None)
+            return False
+
+        content = page.content()
+        soup = BeautifulSoup(content, 'html.parser')
         
-        return reviews
+        product_link = None
+        for a in soup.find_all('a', href=True):
+            if '/p/' in a['href']:
+                product_link = a['href']
+                break
+        
+        if not product_link:
+            print(f"Could not identify product link for {company_name}")
+            self.remember_resolution(company_name, None)
+            return False
+        
+        full_product_url = urljoin(self.base_url, product_link)
+        # Ensure we are at reviews or go to reviews
+        # Capterra URL: /p/ID/Slug/
+        # Reviews are usually lower down or we can try appending "reviews/" if acceptable, 
+        # but standard Capterra is single page app often.
+        # Actually, capturing the reviews might require clicking "Reviews" tab if it exists.
+        
+        print(f"Found product page: {full_product_url}")
+        self.scheduler.navigate(page, full_product_url)
+        
+        # Clicking "Reviews" if it's a tab or scrolling down.
+        # Check for "Reviews" in text to click or verify presence.
+        # Actually, some Capterra pages have /reviews/ suffix valid. Let's try navigating there directly?
+        # Format: https://www.capterra.com/p/123/Product/reviews/ ??
+        # Let's try constructing it.
+        if not full_product_url.endswith('/'):
+            full_product_url += '/'
+        reviews_url = f"{full_product_url}reviews/"
+        
+        print(f"Navigating to reviews page: {reviews_url}")
+        response = self.scheduler.navigate(page, self.sorted_url(reviews_url), ready_selector=CARD_SELECTOR)
+
+        # If 404 or redirect back to product page, then maybe the single page view is used.
+        if response is not None and response.status >= 400 and response.status != 404:
+            raise PageLoadError(f"{reviews_url} returned HTTP {response.status}")
+        if response is None or response.status == 404 or page.url.split('?')[0] != reviews_url:
+            print("Direct reviews link failed, using product page...")
+            self.scheduler.navigate(page, full_product_url, ready_selector=CARD_SELECTOR)
+            # Scroll to reviews or click "Read all reviews"
+            # This part is highly dynamic. For this assignment, we will attempt to find review cards.
+            self.remember_resolution(company_name, full_product_url)
+        else:
+            self.remember_resolution(company_name, reviews_url)
+        return True
@@ -0,0 +1,87 @@
+import json
+import os
+import re
+import time
+from typing import List, Optional, Iterable
+
+
+class Checkpoint:
+    """
+    Progress of one (source, company) crawl: where pagination had got to and
+    which reviews were already emitted. Review ids live in a separate
+    append-only file so saving after every page stays cheap on long crawls.
+    """
+
+    def __init__(self, source: str, company: str, cursor: Optional[str] = None,
+                 cards_processed: int = 0, pages: int = 0, emitted: Optional[List[str]] = None):
+        self.source = source
+        self.company = company
+        # URL of the last page whose reviews were fully emitted
+        self.cursor = cursor
+        # "Show more" lists (Capterra): number of cards already processed
+        self.cards_processed = cards_processed
+        self.pages = pages
+        self.emitted = emitted or []
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "company": self.company,
+            "cursor": self.cursor,
+            "cards_processed": self.cards_processed,
+            "pages": self.pages,
+            "updated": time.time(),
+        }
+
+
+class CheckpointStore:
+    """On-disk checkpoints, one state file plus one id file per (source, company)."""
+
+    def __init__(self, directory: str = ".checkpoints"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _base(self, source: str, company: str) -> str:
+        name = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{source}_{company}").strip("_")
+        return os.path.join(self.directory, name)
+
+    def load(self, source: str, company: str) -> Optional[Checkpoint]:
+        base = self._base(source, company)
+        if not os.path.exists(base + ".json"):
+            return None
+        with open(base + ".json", encoding='utf-8') as f:
+            state = json.load(f)
+        emitted = []
+        if os.path.exists(base + ".ids"):
+            with open(base + ".ids", encoding='utf-8') as f:
+                emitted = [line.strip() for line in f if line.strip()]
+        return Checkpoint(source, company, state.get("cursor"), state.get("cards_processed", 0),
+                          state.get("pages", 0), emitted)
+
+    def start(self, checkpoint: Checkpoint):
+        """Begins a fresh crawl, discarding any older checkpoint for it."""
+        self.clear(checkpoint.source, checkpoint.company)
+        self._write_state(checkpoint)
+
+    def save(self, checkpoint: Checkpoint, new_ids: Iterable[str] = ()):
+        """Appends newly emitted review ids, then atomically replaces the state file."""
+        new_ids = list(new_ids)
+        base = self._base(checkpoint.source, checkpoint.company)
+        if new_ids:
+            with open(base + ".ids", "a", encoding='utf-8') as f:
+                f.write("\n".join(new_ids) + "\n")
+            checkpoint.emitted.extend(new_ids)
+        self._write_state(checkpoint)
+
+    def clear(self, source: str, company: str):
+        base = self._base(source, company)
+        for suffix in (".json", ".ids"):
+            if os.path.exists(base + suffix):
+                os.remove(base + suffix)
+
+    def _write_state(self, checkpoint: Checkpoint):
+        base = self._base(checkpoint.source, checkpoint.company)
+        tmp = base + ".json.tmp"
+        with open(tmp, "w", encoding='utf-8') as f:
+            json.dump(checkpoint.to_dict(), f)
+        os.replace(tmp, base + ".json")
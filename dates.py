@@ -0,0 +1,116 @@
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Sequence, Tuple
+
+# "3 days ago", "an hour ago", "a month ago"
+RELATIVE_RE = re.compile(r"^(a|an|\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago$", re.I)
+
+RELATIVE_UNITS = {
+    "second": timedelta(seconds=1),
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    # Calendar-accurate enough for date windows
+    "month": timedelta(days=30),
+    "year": timedelta(days=365),
+}
+
+RELATIVE_WORDS = {"just now": 0, "today": 0, "yesterday": 1}
+
+# YYYY-MM-DD prefix: worth trying fromisoformat (much faster than strptime)
+ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def is_relative(date_str: str) -> bool:
+    """Whether date_str is relative to today ("2 days ago", "yesterday")."""
+    text = date_str.strip().lower()
+    return text in RELATIVE_WORDS or RELATIVE_RE.match(text) is not None
+
+
+def parse_relative(date_str: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Parses "2 days ago", "yesterday", etc. to midnight of that day, or None."""
+    text = date_str.strip().lower()
+    now = now or datetime.now()
+    if text in RELATIVE_WORDS:
+        when = now - timedelta(days=RELATIVE_WORDS[text])
+    else:
+        match = RELATIVE_RE.match(text)
+        if not match:
+            return None
+        count = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+        when = now - count * RELATIVE_UNITS[match.group(2)]
+    # Same day granularity as the absolute dates sites display
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class DateNormalizer:
+    """
+    Turns one source's date strings into datetimes. A page repeats a few
+    dozen distinct strings at most, so results are memoized, and the format
+    that matched last is tried first (a site uses one format almost always).
+    Also understands ISO 8601 and relative dates ("2 days ago"); relative
+    results depend on the current day and are never memoized.
+    """
+
+    def __init__(self, formats: Sequence[str], max_entries: int = 4096):
+        self.formats = list(formats)
+        self.max_entries = max_entries
+        self._cache: Dict[str, Optional[datetime]] = {}
+        self._last_format: Optional[str] = None
+
+    def _parse_absolute(self, date_str: str) -> Optional[datetime]:
+        if ISO_RE.match(date_str):
+            try:
+                # Date windows are naive and day-granular (end_date is midnight); keep
+                # the wall-clock date only, like the display formats and relative dates
+                parsed = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+                return parsed.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+            except ValueError:
+                pass
+        last = self._last_format
+        for fmt in ([last] if last else []) + [f for f in self.formats if f != last]:
+            try:
+                parsed = datetime.strptime(date_str, fmt)
+            except ValueError:
+                continue
+            self._last_format = fmt
+            return parsed
+        return None
+
+    def parse(self, date_str: Optional[str]) -> Optional[datetime]:
+        """Normalized datetime for date_str, or None if it can't be parsed."""
+        if not date_str:
+            return None
+        try:
+            return self._cache[date_str]
+        except KeyError:
+            pass
+        parsed = self._parse_absolute(date_str)
+        if parsed is None:
+            relative = parse_relative(date_str)
+            if relative is not None:
+                return relative
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+        self._cache[date_str] = parsed
+        return parsed
+
+    def parse_many(self, date_strs: Sequence[Optional[str]]) -> List[Optional[datetime]]:
+        """Parses a page's dates at once: each distinct string is parsed a single time."""
+        distinct = {s: self.parse(s) for s in set(date_strs) if s}
+        return [distinct.get(s) if s else None for s in date_strs]
+
+
+_normalizers: Dict[Tuple[str, Tuple[str, ...]], DateNormalizer] = {}
+_normalizers_lock = threading.Lock()
+
+
+def get_normalizer(source: str, formats: Sequence[str]) -> DateNormalizer:
+    """Process-wide normalizer for a source's date formats, shared by every scraper and thread."""
+    key = (source, tuple(formats))
+    with _normalizers_lock:
+        if key not in _normalizers:
+            _normalizers[key] = DateNormalizer(formats)
+        return _normalizers[key]
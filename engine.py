@@ -0,0 +1,66 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple, Callable
+
+from browser_pool import install_thread_pool, shutdown_thread_pools
+from scraper_base import ReviewScraper, Review
+
+# (scraper, company, review count, error) - error is None on success.
+JobResult = Tuple[ReviewScraper, str, int, Optional[BaseException]]
+
+# Receives each page of reviews as it is scraped: (scraper, company, reviews)
+PageCallback = Callable[[ReviewScraper, str, List[Review]], None]
+
+
+class AsyncScrapeEngine:
+    """
+    Runs (scraper, company) jobs concurrently on an asyncio event loop.
+
+    Each job holds one browser page for its whole run, so max_concurrency is
+    the global page limit. per_domain_limit caps how many jobs hit the same
+    site at once. Blocking Playwright work happens on a fixed set of worker
+    threads, each with its own long-lived browser.
+    """
+
+    def __init__(self, headless: bool = True, max_pages_per_context: int = 50,
+                 max_concurrency: int = 3, per_domain_limit: int = 1):
+        self.headless = headless
+        self.max_pages_per_context = max_pages_per_context
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_domain_limit = max(1, per_domain_limit)
+
+    async def run(self, jobs: List[Tuple[ReviewScraper, str]], start_date: datetime,
+                  end_date: datetime, on_page: PageCallback) -> List[JobResult]:
+        """
+        Scrapes every (scraper, company) job, streaming pages to on_page (called
+        from worker threads) and returns per-job results in job order.
+        Failures are returned rather than raised so one source can't sink the run.
+        """
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="scrape-worker",
+            initializer=install_thread_pool,
+            initargs=(self.headless, self.max_pages_per_context),
+        )
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        domain_limits: Dict[str, asyncio.Semaphore] = {}
+
+        async def run_job(scraper: ReviewScraper, company: str) -> JobResult:
+            domain_limit = domain_limits.setdefault(scraper.domain, asyncio.Semaphore(self.per_domain_limit))
+            async with domain_limit:
+                async with global_limit:
+                    try:
+                        count = await scraper.stream_reviews_async(
+                            company, start_date, end_date,
+                            lambda page: on_page(scraper, company, page), executor=executor)
+                        return scraper, company, count, None
+                    except Exception as e:
+                        return scraper, company, 0, e
+
+        try:
+            return list(await asyncio.gather(*(run_job(s, c) for s, c in jobs)))
+        finally:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, shutdown_thread_pools, executor, self.max_concurrency)
+
@@ -0,0 +1,267 @@
+import re
+from typing import List, Optional, Pattern, Sequence
+
+# Optional fast backends. BeautifulSoup (already a hard dependency) is the fallback.
+try:
+    # selectolax >= 1.0 only ships the lexbor engine
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxHTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as _SelectolaxHTMLParser
+    except ImportError:
+        _SelectolaxHTMLParser = None
+
+try:
+    import lxml.html as _lxml_html
+    import cssselect  # noqa: F401  (lxml needs it for CSS selectors)
+except ImportError:
+    _lxml_html = None
+
+from bs4 import BeautifulSoup
+
+from dates import get_normalizer
+from review import Review
+
+
+class SelectorSpec:
+    """
+    Declarative description of where a source keeps each review field.
+    Every field is a list of CSS selectors tried in order; the first one that
+    matches wins, mirroring the `a or b` fallbacks the scrapers used inline.
+    """
+
+    def __init__(self, source: str, cards: Sequence[str], title: Sequence[str], body: Sequence[str],
+                 date: Sequence[str], body_all: Optional[str] = None, date_attr: Optional[str] = None,
+                 date_strip: Sequence[str] = (), date_formats: Sequence[str] = (),
+                 rating: Sequence[str] = (), rating_attr: Optional[str] = None):
+        self.source = source
+        self.cards = list(cards)
+        self.title = list(title)
+        self.body = list(body)
+        # Body split over several elements (e.g. Pros/Cons), joined with newlines
+        self.body_all = body_all
+        self.date = list(date)
+        # Attribute that holds a machine-readable date, preferred over the text
+        self.date_attr = date_attr
+        # Labels removed from the date text, e.g. "Written on"
+        self.date_strip = list(date_strip)
+        self.date_formats = list(date_formats)
+        self.rating = list(rating)
+        self.rating_attr = rating_attr
+
+    @property
+    def card_selector(self) -> str:
+        """All card selectors as a single CSS selector list."""
+        return ", ".join(self.cards)
+
+
+class HtmlParser:
+    """Minimal interface the extractor needs from an HTML library."""
+
+    name = ""
+
+    def parse(self, html: str):
+        raise NotImplementedError
+
+    def select(self, node, css: str) -> list:
+        raise NotImplementedError
+
+    def select_one(self, node, css: str):
+        found = self.select(node, css)
+        return found[0] if found else None
+
+    def text(self, node) -> str:
+        """Text content with every text node stripped, like get_text(strip=True)."""
+        raise NotImplementedError
+
+    def attr(self, node, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+
+class BeautifulSoupParser(HtmlParser):
+    name = "bs4"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser')
+
+    def select(self, node, css: str) -> list:
+        return node.select(css)
+
+    def select_one(self, node, css: str):
+        return node.select_one(css)
+
+    def text(self, node) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class LxmlParser(HtmlParser):
+    name = "lxml"
+
+    def parse(self, html: str):
+        # document_fromstring so a single-card fragment still sits under the root
+        return _lxml_html.document_fromstring(html or "<html></html>")
+
+    def select(self, node, css: str) -> list:
+        # cssselect only sees descendants of node, matching BeautifulSoup's select
+        return node.cssselect(css)
+
+    def text(self, node) -> str:
+        return "".join(part.strip() for part in node.itertext())
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class SelectolaxParser(HtmlParser):
+    name = "selectolax"
+
+    def parse(self, html: str):
+        return _SelectolaxHTMLParser(html)
+
+    def select(self, node, css: str) -> list:
+        return node.css(css)
+
+    def select_one(self, node, css: str):
+        return node.css_first(css)
+
+    def text(self, node) -> str:
+        return node.text(deep=True, separator="", strip=True)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+
+PARSERS = {
+    "selectolax": SelectolaxParser if _SelectolaxHTMLParser is not None else None,
+    "lxml": LxmlParser if _lxml_html is not None else None,
+    "bs4": BeautifulSoupParser,
+}
+
+
+def available_parsers() -> List[str]:
+    return [name for name, cls in PARSERS.items() if cls is not None]
+
+
+def get_parser(name: str = "auto") -> HtmlParser:
+    """
+    Returns a parser backend by name. 'auto' picks the fastest installed one
+    (selectolax, then lxml) and falls back to BeautifulSoup.
+    """
+    if name == "auto":
+        name = available_parsers()[0]
+    cls = PARSERS.get(name)
+    if cls is None:
+        raise ValueError(f"HTML parser '{name}' is not available (installed: {', '.join(available_parsers())})")
+    return cls()
+
+
+# Selectors the card counter turns into a regex: tag, .classes and one [attr="value"], e.g. div.review[itemprop="review"]
+_SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*)?(?P<classes>(?:\.[\w-]+)*)'
+                              r'(?:\[(?P<attr>[\w-]+)=["\'](?P<value>[^"\']*)["\']\])?$')
+
+
+def _card_marker(css: str) -> Optional[Pattern]:
+    """Regex matching the opening tags css selects, or None if css is too complex to translate."""
+    match = _SIMPLE_SELECTOR.match(css.strip())
+    if match is None or not any(match.group("tag", "classes", "attr")):
+        return None
+    checks = "".join(rf'(?=[^>]*\sclass=["\'](?:[^"\']*\s)?{re.escape(cls)}(?:\s[^"\']*)?["\'])'
+                     for cls in match.group("classes").split(".")[1:])
+    if match.group("attr"):
+        checks += rf'(?=[^>]*\s{re.escape(match.group("attr"))}=["\']{re.escape(match.group("value"))}["\'])'
+    tag = re.escape(match.group("tag")) if match.group("tag") else r"[a-zA-Z][\w-]*"
+    return re.compile(rf'<{tag}(?=[\s/>]){checks}', re.I)
+
+
+def count_cards(html: str, spec: SelectorSpec, parser: Optional[HtmlParser] = None) -> int:
+    """
+    Review cards in html, counted with the first card selector that matches.
+    Simple selectors are counted with a regex over opening tags instead of
+    parsing the page; others fall back to the parser.
+    """
+    doc = None
+    for css in spec.cards:
+        marker = _card_marker(css)
+        if marker is not None:
+            count = len(marker.findall(html))
+        else:
+            parser = parser or get_parser()
+            doc = doc if doc is not None else parser.parse(html)
+            count = len(parser.select(doc, css))
+        if count:
+            return count
+    return 0
+
+
+def _first(parser: HtmlParser, node, selectors: Sequence[str]):
+    for css in selectors:
+        found = parser.select_one(node, css)
+        if found is not None:
+            return found
+    return None
+
+
+def extract_card(parser: HtmlParser, card, spec: SelectorSpec) -> Review:
+    """
+    One card's review, without the normalized date (extract_reviews adds it
+    for the whole page). Raises if the card's markup is unusable.
+    """
+    title_el = _first(parser, card, spec.title)
+    title = parser.text(title_el) if title_el is not None else "No Title"
+
+    description = ""
+    if spec.body_all:
+        description = "\n".join(parser.text(el) for el in parser.select(card, spec.body_all))
+    if not description:
+        body_el = _first(parser, card, spec.body)
+        description = parser.text(body_el) if body_el is not None else ""
+
+    date_el = _first(parser, card, spec.date)
+    date_str = parser.text(date_el) if date_el is not None else ""
+    if date_el is not None and spec.date_attr and parser.attr(date_el, spec.date_attr):
+        date_str = parser.attr(date_el, spec.date_attr)
+    for label in spec.date_strip:
+        date_str = date_str.replace(label, "").strip()
+
+    rating = None
+    rating_el = _first(parser, card, spec.rating)
+    if rating_el is not None:
+        raw = parser.attr(rating_el, spec.rating_attr) if spec.rating_attr else parser.text(rating_el)
+        try:
+            rating = float(raw)
+        except (TypeError, ValueError):
+            rating = None
+
+    return Review(spec.source, title, description, date_str, rating)
+
+
+def extract_reviews(html: str, spec: SelectorSpec, parser: Optional[HtmlParser] = None) -> List[Review]:
+    """
+    Parses html once and returns every review found, in page order. The first
+    card selector with matches is used; cards that fail to parse are skipped.
+    """
+    parser = parser or get_parser()
+    doc = parser.parse(html)
+
+    cards = []
+    for css in spec.cards:
+        cards = parser.select(doc, css)
+        if cards:
+            break
+
+    reviews = []
+    for card in cards:
+        try:
+            reviews.append(extract_card(parser, card, spec))
+        except Exception as e:
+            print(f"Error parsing a {spec.source} review: {e}")
+            continue
+
+    # Normalized dates for filtering, parsed for the whole page at once
+    dates = get_normalizer(spec.source, spec.date_formats).parse_many([r.date for r in reviews])
+    for review, dt in zip(reviews, dates):
+        review.dt = dt
+    return reviews
@@ -0,0 +1,103 @@
+import threading
+from typing import NamedTuple, Optional
+
+# Optional dependency: without httpx, HTTP fetch mode falls back to the browser
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# HTTP/2 needs the h2 package (pip install "httpx[http2]"); HTTP/1.1 keep-alive otherwise
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+from browser_pool import DEFAULT_USER_AGENT
+from page_cache import PageCache
+
+DEFAULT_HEADERS = {
+    "User-Agent": DEFAULT_USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    # No Accept-Encoding: httpx advertises the encodings it can decode (br only with brotli installed)
+}
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    text: str
+    # Bytes on the wire (compressed); 0 for a 304 answered from the cache
+    bytes_received: int = 0
+    # True if the server answered 304 and text came from the cache
+    not_modified: bool = False
+
+
+class HttpFetcher:
+    """
+    Pooled keep-alive HTTP client for server-rendered review pages. One
+    client (HTTP/2 when available, compressed responses) is shared by every
+    scraper thread. With a page cache, responses carrying an ETag or
+    Last-Modified header are stored, and later requests for the same URL
+    are made conditional; a 304 is answered from the cache.
+    """
+
+    def __init__(self, timeout: float = 30.0, max_connections: int = 20):
+        if httpx is None:
+            raise RuntimeError("HTTP fetch mode needs httpx (pip install \"httpx[http2]\")")
+        self.client = httpx.Client(
+            http2=HTTP2,
+            headers=DEFAULT_HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def get(self, url: str, cache: Optional[PageCache] = None) -> HttpResponse:
+        """GETs url, conditionally if cache holds validators for it. Network errors are raised."""
+        cached = cache.get_response(url) if cache is not None else None
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = self.client.get(url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return HttpResponse(200, cached[2], response.num_bytes_downloaded, not_modified=True)
+
+        text = response.text
+        etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+        if cache is not None and response.status_code == 200 and (etag or last_modified):
+            cache.put_response(url, etag, last_modified, text)
+        return HttpResponse(response.status_code, text, response.num_bytes_downloaded)
+
+    def close(self):
+        self.client.close()
+
+
+_fetcher: Optional[HttpFetcher] = None
+_fetcher_lock = threading.Lock()
+_warned = False
+
+
+def get_http_fetcher() -> Optional[HttpFetcher]:
+    """Process-wide HTTP client, or None (after one warning) if httpx isn't installed."""
+    global _fetcher, _warned
+    with _fetcher_lock:
+        if _fetcher is None and httpx is not None:
+            _fetcher = HttpFetcher()
+        if _fetcher is None and not _warned:
+            print("HTTP fetch mode needs httpx (pip install \"httpx[http2]\"); using the browser instead.")
+            _warned = True
+        return _fetcher
+
+
+def close_http_fetcher():
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is not None:
+            _fetcher.close()
+            _fetcher = None
@@ -1,18 +1,124 @@
 import argparse
-import json
+import asyncio
+import os
 import traceback
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Optional, Sequence
 
+from browser_pool import BrowserPool
+from engine import AsyncScrapeEngine
 from g2_scraper import G2Scraper
 from capterra_scraper import CapterraScraper
 from trustradius_scraper import TrustRadiusScraper
+from scraper_base import ReviewScraper, DedupIndex, Review
+from checkpoint import CheckpointStore
+from store import ReviewStore
+from page_cache import PageCache
+from resolution_cache import ResolutionCache
+from metrics import get_metrics
+from scheduler import get_scheduler
+from http_fetch import close_http_fetcher
+from sharding import close_shard_executors
+from output import NdjsonWriter, ndjson_to_json
 
-def json_serial(obj):
-    """JSON serializer for objects not serializable by default json code"""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError ("Type %s not serializable" % type(obj))
+SCRAPER_CLASSES = {
+    "g2": G2Scraper,
+    "capterra": CapterraScraper,
+    "trustradius": TrustRadiusScraper,
+}
+
+def build_scrapers(source: str, headless: bool, pool: Optional[BrowserPool] = None,
+                   dedup: Optional[DedupIndex] = None, sort_newest_first: bool = True,
+                   fast: bool = False, parser: str = "auto",
+                   checkpoints: Optional[CheckpointStore] = None, resume: bool = False,
+                   store: Optional[ReviewStore] = None, incremental: bool = False,
+                   page_cache: Optional[PageCache] = None,
+                   resolutions: Optional[ResolutionCache] = None, structured: bool = False,
+                   shards: int = 1, parse_workers: int = 0, http_sources: Sequence[str] = ()) -> List[ReviewScraper]:
+    """
+    Instantiates the scrapers selected by --source ('all' for every source).
+    Sources named in http_sources ('all' for every one) use HTTP fetch mode.
+    """
+    return [cls(headless=headless, pool=pool, dedup=dedup, sort_newest_first=sort_newest_first, fast=fast,
+                parser=parser, checkpoints=checkpoints, resume=resume, store=store, incremental=incremental,
+                page_cache=page_cache, resolutions=resolutions, structured=structured, shards=shards,
+                parse_workers=parse_workers, http=name in http_sources or "all" in http_sources)
+            for name, cls in SCRAPER_CLASSES.items()
+            if source == name or source == "all"]
+
+def parse_sources(value: Optional[str]) -> List[str]:
+    """'g2,trustradius' -> ['g2', 'trustradius']"""
+    return [name.strip().lower() for name in (value or "").split(",") if name.strip()]
+
+def set_host_concurrency(limit: int):
+    """Caps how many browsers a sharded crawl may point at each source's host at once."""
+    for cls in SCRAPER_CLASSES.values():
+        get_scheduler(cls.domain).set_max_concurrent(limit)
+
+def set_host_rate(rate: float):
+    """Requests per second each source's host may be sent, shared by all its browsers and shards."""
+    for cls in SCRAPER_CLASSES.values():
+        get_scheduler(cls.domain).set_rate(rate)
+
+def store_reviews(scraper: ReviewScraper, company: str, reviews: List[Review]):
+    """Adds a page of reviews to the scraper's review store, if it has one."""
+    if scraper.store is not None:
+        scraper.store.add_reviews(company, reviews)
+
+def clean_reviews(scraper: ReviewScraper, reviews: List[Review], start_date: datetime, end_date: datetime) -> List[Review]:
+    """Applies the final date filter to a scraper's output (Review.dt is never serialized)."""
+    # Filter just in case scraper returned extra
+    return scraper.filter_reviews_by_date(reviews, start_date, end_date)
+
+def run_scrapers(scrapers: List[ReviewScraper], company: str, start_date: datetime, end_date: datetime,
+                 sink: NdjsonWriter, replay: bool = False) -> int:
+    """
+    Runs each scraper in turn, writing date-filtered reviews to sink page by
+    page. With replay=True reviews are re-extracted from the page cache
+    instead of crawled. Returns the total written.
+    """
+    total = 0
+    for scraper in scrapers:
+        collected = 0
+        pages = scraper.iter_replay_pages if replay else scraper.iter_review_pages
+        try:
+            with get_metrics().timer("scrape_seconds", scraper.domain):
+                for page in pages(company, start_date, end_date):
+                    store_reviews(scraper, company, page)
+                    filtered = clean_reviews(scraper, page, start_date, end_date)
+                    sink.write_many(filtered)
+                    # The scraper checkpoints this page as emitted once we return; make that true
+                    sink.flush()
+                    collected += len(filtered)
+            print(f"Collected {collected} reviews from {scraper.__class__.__name__}.")
+        except Exception as e:
+            print(f"Failed to scrape using {scraper.__class__.__name__}: {e}")
+            traceback.print_exc()
+        total += collected
+    return total
+
+def run_scrapers_concurrently(scrapers: List[ReviewScraper], company: str, start_date: datetime, end_date: datetime,
+                              sink: NdjsonWriter, engine: AsyncScrapeEngine) -> int:
+    """Same as run_scrapers, but all sources scrape in parallel on the async engine."""
+    collected = {scraper: 0 for scraper in scrapers}
+
+    def on_page(scraper: ReviewScraper, _company: str, page: List[Review]):
+        # Called from the engine's worker threads; each scraper only ever runs on one
+        store_reviews(scraper, _company, page)
+        filtered = clean_reviews(scraper, page, start_date, end_date)
+        sink.write_many(filtered)
+        # The scraper checkpoints this page as emitted once we return; make that true
+        sink.flush()
+        collected[scraper] += len(filtered)
+
+    results = asyncio.run(engine.run([(s, company) for s in scrapers], start_date, end_date, on_page))
+    for scraper, _, _, error in results:
+        if error is not None:
+            print(f"Failed to scrape using {scraper.__class__.__name__}: {error}")
+            traceback.print_exception(type(error), error, error.__traceback__)
+            continue
+        print(f"Collected {collected[scraper]} reviews from {scraper.__class__.__name__}.")
+    return sum(collected.values())
 
 def main():
     parser = argparse.ArgumentParser(description="Scrape product reviews from G2, Capterra, and TrustRadius.")
@@ -24,6 +130,66 @@ def main():
                         help="Source to scrape from. Use 'all' for all sources.")
     parser.add_argument("--headless", action="store_true", default=True, help="Run browser in headless mode.")
     parser.add_argument("--no-headless", action="store_false", dest="headless", help="Run browser in visible mode (debug).")
+    parser.add_argument("--max-pages-per-context", type=int, default=50,
+                        help="Recycle the browser context after this many page loads.")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Scrape all selected sources in parallel instead of one after another.")
+    parser.add_argument("--max-concurrency", type=int, default=3,
+                        help="Concurrent mode: maximum number of browser pages open at once.")
+    parser.add_argument("--per-domain-limit", type=int, default=1,
+                        help="Concurrent mode: maximum simultaneous jobs against the same site.")
+    parser.add_argument("--fast", action="store_true",
+                        help="Block images, fonts, media and third-party hosts while loading pages.")
+    parser.add_argument("--parser", default="auto", choices=["auto", "selectolax", "lxml", "bs4"],
+                        help="HTML parser for review extraction. 'auto' uses the fastest one installed.")
+    parser.add_argument("--structured", action="store_true",
+                        help="Read reviews from the sites' JSON payloads and embedded JSON-LD when present, "
+                             "paginating with plain requests; CSS selectors remain the fallback.")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Load numbered review pages (G2, TrustRadius) on this many browsers in parallel. "
+                             "Shards share their site's --host-rate, so raise it too for a real speedup.")
+    parser.add_argument("--host-concurrency", type=int, default=4,
+                        help="Sharded mode: maximum browsers loading pages from the same site at once.")
+    parser.add_argument("--host-rate", type=float, default=0.5,
+                        help="Requests per second sent to each site (bursts of 2), shared by every browser and shard.")
+    parser.add_argument("--http", default=None, metavar="SOURCES",
+                        help="Comma-separated sources (or 'all') to fetch with a pooled HTTP client instead of a "
+                             "browser where their pages are server-rendered (G2, TrustRadius); needs httpx. "
+                             "Falls back to the browser on challenges or JavaScript-only pages.")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Parse pages on this many threads while the browser loads the next page (0 = inline).")
+    parser.add_argument("--full-crawl", action="store_true",
+                        help="Walk every page in site order instead of sorting newest first and stopping at start_date.")
+    parser.add_argument("--format", default="json", choices=["json", "ndjson"],
+                        help="Output format. Reviews are always streamed to NDJSON while scraping; "
+                             "'json' converts that to a pretty-printed array at the end.")
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress the NDJSON stream.")
+    parser.add_argument("--dedup-index", default=None,
+                        help="File of review fingerprints kept between runs; reviews already in it are skipped.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoints, appending to the existing NDJSON stream.")
+    parser.add_argument("--store", default=None,
+                        help="SQLite database every scraped review is saved to (default reviews.db with --incremental).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch reviews newer than the newest one in the store for each source.")
+    parser.add_argument("--page-cache", default=None,
+                        help="Keep the raw HTML of every parsed page in this compressed cache file.")
+    parser.add_argument("--cache-ttl-hours", type=float, default=168,
+                        help="Drop cached pages older than this many hours.")
+    parser.add_argument("--cache-max-mb", type=float, default=500,
+                        help="Evict least recently used cached pages above this compressed size.")
+    parser.add_argument("--replay", action="store_true",
+                        help="Re-extract reviews from the page cache (default page_cache.db) without launching a browser.")
+    parser.add_argument("--resolution-cache", default="resolutions.db",
+                        help="File caching each company's product URL per source ('' to disable).")
+    parser.add_argument("--refresh-resolution", action="store_true",
+                        help="Ignore cached product URLs for this company and resolve them again.")
+    parser.add_argument("--checkpoint-dir", default=".checkpoints",
+                        help="Directory for per-source crawl checkpoints.")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Write run metrics here at the end: Prometheus text for .prom/.txt, JSON otherwise.")
+    parser.add_argument("--metrics-log", default=None,
+                        help="Append one JSON line per scraped page (timings, bytes, review counts) to this file.")
 
     args = parser.parse_args()
 
@@ -38,40 +204,112 @@ def main():
     if start_date > end_date:
         print("Error: Start date cannot be after end date.")
         return
+    if args.host_rate <= 0:
+        print("Error: --host-rate must be positive.")
+        return
+
+    set_host_concurrency(args.host_concurrency)
+    set_host_rate(args.host_rate)
+    http_sources = parse_sources(args.http)
 
     print(f"Scraping reviews for '{args.company}' from {start_date.date()} to {end_date.date()}...")
 
-    scrapers = []
-    if args.source == "g2" or args.source == "all":
-        scrapers.append(G2Scraper(headless=args.headless))
-    if args.source == "capterra" or args.source == "all":
-        scrapers.append(CapterraScraper(headless=args.headless))
-    if args.source == "trustradius" or args.source == "all":
-        scrapers.append(TrustRadiusScraper(headless=args.headless))
+    # Shared by all sources so duplicates are caught across pages and runs
+    dedup = DedupIndex(args.dedup_index)
+    if args.dedup_index:
+        print(f"Loaded {len(dedup)} known review fingerprints from {args.dedup_index}")
 
-    all_reviews = []
+    # Reviews are streamed to disk as they arrive, so a crash keeps everything scraped so far
+    stream_filename = f"{args.company}_reviews.ndjson" + (".gz" if args.gzip else "")
+    # Checkpoints decide where each source resumes; pages they list as emitted
+    # are in the stream file of the interrupted run, so append to it
+    resuming = args.resume
+    if resuming and not os.path.exists(stream_filename):
+        print(f"No stream file {stream_filename}; reviews emitted before the interruption won't be in this run's output.")
+    sink = NdjsonWriter(stream_filename, append=resuming)
+    checkpoints = CheckpointStore(args.checkpoint_dir)
+    store_path = args.store or ("reviews.db" if args.incremental else None)
+    store = ReviewStore(store_path) if store_path else None
+    cache_path = args.page_cache or ("page_cache.db" if args.replay else None)
+    page_cache = PageCache(cache_path, ttl=args.cache_ttl_hours * 3600,
+                           max_bytes=int(args.cache_max_mb * 1024 * 1024)) if cache_path else None
+    resolutions = ResolutionCache(args.resolution_cache) if args.resolution_cache else None
+    if resolutions is not None and args.refresh_resolution:
+        resolutions.invalidate(company=args.company)
+    metrics = get_metrics()
+    if args.metrics_log:
+        metrics.open_log(args.metrics_log)
 
-    for scraper in scrapers:
-        try:
-            reviews = scraper.fetch_reviews(args.company, start_date, end_date)
-            # Filter just in case scraper returned extra
-            filtered = scraper.filter_reviews_by_date(reviews, start_date, end_date)
-            # Remove internal keys for clean output
-            for r in filtered:
-                if '_dt' in r:
-                    del r['_dt']
-            all_reviews.extend(filtered)
-            print(f"Collected {len(filtered)} reviews from {scraper.__class__.__name__}.")
-        except Exception as e:
-            print(f"Failed to scrape using {scraper.__class__.__name__}: {e}")
-            traceback.print_exc()
+    try:
+        if args.replay:
+            # Cached HTML only: no browser, no network, no rate limits
+            scrapers = build_scrapers(args.source, args.headless, dedup=dedup, parser=args.parser,
+                                      store=store, page_cache=page_cache, structured=args.structured)
+            total = run_scrapers(scrapers, args.company, start_date, end_date, sink, replay=True)
+        elif args.concurrent:
+            # Worker threads of the engine each own a browser; no shared pool here.
+            engine = AsyncScrapeEngine(headless=args.headless, max_pages_per_context=args.max_pages_per_context,
+                                       max_concurrency=args.max_concurrency, per_domain_limit=args.per_domain_limit)
+            scrapers = build_scrapers(args.source, args.headless, dedup=dedup,
+                                      sort_newest_first=not args.full_crawl, fast=args.fast,
+                                      parser=args.parser, checkpoints=checkpoints, resume=resuming,
+                                      store=store, incremental=args.incremental, page_cache=page_cache,
+                                      resolutions=resolutions, structured=args.structured, shards=args.shards,
+                                      parse_workers=args.parse_workers,
+                                      http_sources=http_sources)
+            total = run_scrapers_concurrently(scrapers, args.company, start_date, end_date, sink, engine)
+        else:
+            # One browser process for the whole run; each scraper gets its own context.
+            pool = BrowserPool(headless=args.headless, max_pages_per_context=args.max_pages_per_context)
+            scrapers = build_scrapers(args.source, args.headless, pool, dedup,
+                                      sort_newest_first=not args.full_crawl, fast=args.fast,
+                                      parser=args.parser, checkpoints=checkpoints, resume=resuming,
+                                      store=store, incremental=args.incremental, page_cache=page_cache,
+                                      resolutions=resolutions, structured=args.structured, shards=args.shards,
+                                      parse_workers=args.parse_workers,
+                                      http_sources=http_sources)
+            try:
+                total = run_scrapers(scrapers, args.company, start_date, end_date, sink)
+            finally:
+                pool.close()
+    finally:
+        sink.close()
+        if store is not None:
+            store.close()
+        if page_cache is not None:
+            page_cache.close()
+        if resolutions is not None:
+            resolutions.close()
+        close_http_fetcher()
+        close_shard_executors()
+        metrics.close_log()
+
+    # Where the time went, per site
+    print("\n" + metrics.summary())
+    if args.metrics_file:
+        metrics.write(args.metrics_file)
+        print(f"Metrics written to {args.metrics_file}")
+
+    # A source that failed or stopped early leaves its checkpoint behind
+    unfinished = [] if args.replay else [
+        s.selectors.source for s in scrapers if checkpoints.load(s.selectors.source, args.company) is not None]
+
+    output_filename = stream_filename
+    if args.format == "json":
+        # Output JSON
+        output_filename = f"{args.company}_reviews.json"
+        total = ndjson_to_json(stream_filename, output_filename)
+        if not unfinished:
+            os.remove(stream_filename)
+    if unfinished:
+        # The stream is what --resume appends to; it goes once every source has finished
+        print(f"\n{', '.join(unfinished)} did not finish; rerun with the same arguments plus --resume "
+              f"to continue (keeping {stream_filename}).")
 
-    # Output JSON
-    output_filename = f"{args.company}_reviews.json"
-    with open(output_filename, "w", encoding='utf-8') as f:
-        json.dump(all_reviews, f, default=json_serial, indent=4)
+    # Only remember reviews once they are safely on disk
+    dedup.save()
 
-    print(f"\nSuccess! Saved {len(all_reviews)} reviews to {output_filename}")
+    print(f"\nSuccess! Saved {total} reviews to {output_filename}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+# Timing samples kept per (metric, site) for percentiles; older ones are dropped
+MAX_SAMPLES = 2048
+
+
+class Timing:
+    """Count/sum/max of a duration plus a bounded window of samples for percentiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 4),
+            "max": round(self.max, 4),
+            "p50": round(self.quantile(0.5), 4),
+            "p95": round(self.quantile(0.95), 4),
+        }
+
+
+class Metrics:
+    """
+    Process-wide counters and timings, labelled by site (the scraper's
+    domain). Timings are page loads, page.content() serialization and review
+    extraction; counters are bytes, reviews extracted/kept/dropped, retries
+    and challenge pages. Optionally writes one JSON line per scraped page
+    to a log file. Safe to share between scraper threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._timings: Dict[Tuple[str, str], Timing] = defaultdict(Timing)
+        self._last = threading.local()
+        self._log = None
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+    def open_log(self, path: str):
+        """Starts appending structured (JSON lines) page events to path."""
+        self._log = open(path, "a", encoding='utf-8')
+
+    def close_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def inc(self, name: str, site: str, value: float = 1):
+        with self._lock:
+            self._counters[(name, site)] += value
+
+    def observe(self, name: str, site: str, seconds: float):
+        with self._lock:
+            self._timings[(name, site)].add(seconds)
+        # Remembered per thread so the page event can report it
+        setattr(self._last, name, seconds)
+
+    def last(self, name: str) -> Optional[float]:
+        """The calling thread's most recent observation of a timing."""
+        return getattr(self._last, name, None)
+
+    @contextmanager
+    def timer(self, name: str, site: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, site, time.perf_counter() - started)
+
+    def log(self, event: str, **fields):
+        if self._log is None:
+            return
+        line = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str)
+        with self._lock:
+            self._log.write(line + "\n")
+            self._log.flush()
+
+    def _last_rounded(self, name: str, value: Optional[float] = None) -> Optional[float]:
+        value = self.last(name) if value is None else value
+        return round(value, 4) if value is not None else None
+
+    def record_page(self, site: str, source: str, company: str, url: str, extracted: int, kept: int,
+                    bytes_received: int = 0, parse_seconds: Optional[float] = None,
+                    load_seconds: Optional[float] = None, content_seconds: Optional[float] = None):
+        """
+        Counts one scraped page and logs it together with this thread's latest
+        timings. parse_seconds, load_seconds and content_seconds override the
+        latter when the page was parsed or loaded on another thread.
+        """
+        self.inc("pages", site)
+        self.inc("reviews_extracted", site, extracted)
+        self.inc("reviews_kept", site, kept)
+        self.inc("reviews_dropped", site, extracted - kept)
+        self.inc("bytes_received", site, bytes_received)
+        self.log("page", site=site, source=source, company=company, url=url,
+                 extracted=extracted, kept=kept, dropped=extracted - kept, bytes=bytes_received,
+                 load_seconds=self._last_rounded("page_load_seconds", load_seconds),
+                 content_seconds=self._last_rounded("content_seconds", content_seconds),
+                 parse_seconds=self._last_rounded("parse_seconds", parse_seconds))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """{site: {metric: value or timing summary}}"""
+        out: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        with self._lock:
+            for (name, site), value in self._counters.items():
+                out[site][name] = value
+            for (name, site), timing in self._timings.items():
+                out[site][name] = timing.to_dict()
+        return dict(out)
+
+    def summary(self) -> str:
+        """Human-readable end-of-run table, one row per site."""
+        data = self.to_dict()
+        if not data:
+            return "No metrics recorded."
+
+        def timing(site_data, name, field):
+            return site_data.get(name, {}).get(field, 0.0)
+
+        header = (f"{'site':<24} {'pages':>6} {'kept':>7} {'dropped':>8} {'MB':>7} {'load p50':>9} "
+                  f"{'load p95':>9} {'content':>8} {'parse':>8} {'retries':>8} {'challenges':>10}")
+        lines = [header]
+        for site, d in sorted(data.items()):
+            lines.append(
+                f"{site:<24} {int(d.get('pages', 0)):>6} {int(d.get('reviews_kept', 0)):>7} "
+                f"{int(d.get('reviews_dropped', 0)):>8} {d.get('bytes_received', 0) / 1e6:>7.1f} "
+                f"{timing(d, 'page_load_seconds', 'p50'):>9.2f} {timing(d, 'page_load_seconds', 'p95'):>9.2f} "
+                f"{timing(d, 'content_seconds', 'sum'):>8.2f} {timing(d, 'parse_seconds', 'sum'):>8.2f} "
+                f"{int(d.get('retries', 0)):>8} {int(d.get('challenges', 0)):>10}")
+        return "\n".join(lines)
+
+    def write_json(self, path: str):
+        with open(path, "w", encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def write_prometheus(self, path: str):
+        """Prometheus text exposition format (counters, and timings as summaries)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timings = sorted(self._timings.items(), key=lambda item: item[0])
+        lines = []
+        declared = set()
+        for (name, site), value in counters:
+            metric = f"scraper_{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f'{metric}{{site="{site}"}} {value:g}')
+        for (name, site), timing in timings:
+            metric = f"scraper_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} summary")
+                declared.add(metric)
+            for q in (0.5, 0.95):
+                lines.append(f'{metric}{{site="{site}",quantile="{q}"}} {timing.quantile(q):.6f}')
+            lines.append(f'{metric}_sum{{site="{site}"}} {timing.total:.6f}')
+            lines.append(f'{metric}_count{{site="{site}"}} {timing.count}')
+        with open(path, "w", encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def write(self, path: str):
+        """Writes Prometheus text for .prom/.txt paths, JSON otherwise."""
+        if path.endswith((".prom", ".txt")):
+            self.write_prometheus(path)
+        else:
+            self.write_json(path)
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The process-wide metrics registry."""
+    return _metrics
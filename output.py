@@ -0,0 +1,103 @@
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Dict, Any, Union
+
+from review import Review
+
+
+def json_serial(obj):
+    """JSON serializer for objects not serializable by default json code"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Review):
+        return obj.to_dict()
+    raise TypeError ("Type %s not serializable" % type(obj))
+
+
+def _open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class NdjsonWriter:
+    """
+    Streams reviews to an NDJSON file (gzip-compressed if the path ends in
+    .gz) as they arrive, one JSON object per line. Flushes every
+    `flush_every` reviews or `flush_interval` seconds, so a crash loses at
+    most the last few reviews. Safe to share between scraper threads.
+    """
+
+    def __init__(self, path: str, flush_every: int = 100, flush_interval: float = 5.0, append: bool = False):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = _open_text(path, "a" if append else "w")
+
+    def write(self, review: Union[Review, Dict[str, Any]]):
+        self.write_many([review])
+
+    def write_many(self, reviews: Iterable[Union[Review, Dict[str, Any]]]):
+        lines = [(r.to_json() if isinstance(r, Review) else json.dumps(r, default=json_serial, ensure_ascii=False)) + "\n"
+                 for r in reviews]
+        if not lines:
+            return
+        with self._lock:
+            self._file.writelines(lines)
+            self.count += len(lines)
+            self._unflushed += len(lines)
+            if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """Flushes now, e.g. before a checkpoint records the written reviews as emitted."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._file.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_ndjson(path: str) -> Iterable[Dict[str, Any]]:
+    with _open_text(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def ndjson_to_json(ndjson_path: str, json_path: str) -> int:
+    """
+    Rewrites an NDJSON file as the pretty-printed JSON array main.py has
+    always produced (same layout as json.dump(..., indent=4)), one review at
+    a time so the whole list never sits in memory. Returns the review count.
+    """
+    count = 0
+    with open(json_path, "w", encoding='utf-8') as out:
+        for review in iter_ndjson(ndjson_path):
+            item = json.dumps(review, default=json_serial, indent=4)
+            out.write("[\n" if count == 0 else ",\n")
+            out.write("\n".join("    " + line for line in item.splitlines()))
+            count += 1
+        out.write("\n]" if count else "[]")
+    return count
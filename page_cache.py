@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Iterator, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key        TEXT PRIMARY KEY,
+    source     TEXT NOT NULL,
+    company    TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    size       INTEGER NOT NULL,
+    html       BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_crawl ON pages (source, company, seq);
+CREATE INDEX IF NOT EXISTS idx_pages_last_used ON pages (last_used);
+CREATE TABLE IF NOT EXISTS responses (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    fetched_at    REAL NOT NULL,
+    html          BLOB NOT NULL
+);
+"""
+
+
+class PageCache:
+    """
+    Compressed on-disk cache of the raw HTML each scraper parsed, so reviews
+    can be re-extracted (e.g. after a selector fix) without crawling again.
+
+    Pages are keyed by source, company, URL and position in the crawl (page
+    number or "Show more" batch). Entries older than ttl seconds are dropped,
+    and once the compressed total passes max_bytes the least recently used
+    pages are evicted. Backed by SQLite so scraper threads and batch worker
+    processes can share one cache file.
+
+    HTTP fetch mode also keeps each URL's last response with its ETag and
+    Last-Modified validators here, for conditional requests.
+    """
+
+    def __init__(self, path: str = "page_cache.db", ttl: float = 7 * 24 * 3600,
+                 max_bytes: int = 500 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _key(source: str, company: str, url: str, seq: int) -> str:
+        return "\x1f".join([source, company.lower(), url, str(seq)])
+
+    def put(self, source: str, company: str, url: str, seq: int, html: str):
+        """Stores the HTML seen at position seq of a crawl, replacing any older copy."""
+        data = zlib.compress(html.encode('utf-8'), 6)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, source, company, url, seq, fetched_at, last_used, size, html) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(source, company, url, seq), source, company.lower(), url, seq, now, now,
+                 len(data), data))
+            self._evict(now)
+
+    def get(self, source: str, company: str, url: str, seq: int) -> Optional[str]:
+        """Cached HTML for one page, or None if missing or expired."""
+        key = self._key(source, company, url, seq)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT html, fetched_at FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                return None
+            self._conn.execute("UPDATE pages SET last_used = ? WHERE key = ?", (now, key))
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def iter_pages(self, source: str, company: str) -> Iterator[str]:
+        """Unexpired cached pages of one crawl, in crawl order."""
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT key, html FROM pages WHERE source = ? AND company = ? AND fetched_at >= ? "
+                "ORDER BY seq, fetched_at", (source, company.lower(), now - self.ttl)).fetchall()
+            self._conn.executemany("UPDATE pages SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows])
+        for _, data in rows:
+            yield zlib.decompress(data).decode('utf-8')
+
+    def get_response(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
+        """(etag, last_modified, html) of the last HTTP response for url, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, html, fetched_at FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None or time.time() - row[3] > self.ttl:
+            return None
+        return row[0], row[1], zlib.decompress(row[2]).decode('utf-8')
+
+    def put_response(self, url: str, etag: Optional[str], last_modified: Optional[str], html: str):
+        """Stores an HTTP response that carried validators."""
+        data = zlib.compress(html.encode('utf-8'), 6)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, fetched_at, html) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, time.time(), data))
+
+    def _evict(self, now: float):
+        """Drops expired pages, then least recently used ones until under max_bytes. Caller holds the lock."""
+        self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.ttl,))
+        self._conn.execute("DELETE FROM responses WHERE fetched_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM pages ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE key = ?", doomed)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,78 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from review import Review
+
+
+class PageSnapshot(NamedTuple):
+    """Raw HTML of one page (or Show more batch) taken by the browser thread."""
+    url: str
+    # Position in the crawl (page number or card offset), as used by the page cache
+    seq: int
+    html: str
+    bytes_received: int = 0
+    # Capterra: cards processed once this batch is done (checkpoint cursor)
+    cards_processed: Optional[int] = None
+
+
+class ParsePipeline:
+    """
+    Parses page snapshots on a pool of worker threads while the browser
+    thread goes on loading the next page. Results come back in submission
+    order. At most `max_pending` snapshots are queued or being parsed; the
+    browser thread checks full() and waits for the oldest result before
+    taking another snapshot, so memory stays bounded however fast pages load.
+
+    Threads rather than processes: the browser thread spends its time
+    blocked on Playwright I/O, and the C parsers (lxml, selectolax) release
+    the GIL, so the two overlap without pickling every page and review.
+    """
+
+    def __init__(self, parse: Callable[[str], List[Review]], workers: int = 2, max_pending: Optional[int] = None):
+        self.parse = parse
+        self.max_pending = max_pending or workers * 2
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+        self._pending = deque()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def full(self) -> bool:
+        return len(self._pending) >= self.max_pending
+
+    def _timed_parse(self, html: str) -> Tuple[List[Review], float]:
+        started = time.perf_counter()
+        reviews = self.parse(html)
+        return reviews, time.perf_counter() - started
+
+    def submit(self, snapshot: PageSnapshot):
+        self._pending.append((snapshot, self._executor.submit(self._timed_parse, snapshot.html)))
+
+    def completed(self, wait: bool = False) -> Iterator[Tuple[PageSnapshot, List[Review], float]]:
+        """
+        (snapshot, reviews, parse seconds) for every finished snapshot at the
+        head of the queue, in order. With wait=True blocks for the oldest
+        one first. Parse errors are raised here.
+        """
+        while self._pending:
+            snapshot, future = self._pending[0]
+            if not (wait or future.done()):
+                return
+            wait = False
+            reviews, seconds = future.result()
+            self._pending.popleft()
+            yield snapshot, reviews, seconds
+
+    def close(self):
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resolutions (
+    source      TEXT NOT NULL,
+    company     TEXT NOT NULL,
+    url         TEXT,
+    resolved_at REAL NOT NULL,
+    PRIMARY KEY (source, company)
+);
+"""
+
+# Returned by lookup() when an earlier run found no product for the company
+NOT_FOUND = object()
+
+
+class ResolutionCache:
+    """
+    Persistent company -> product URL mapping per source, so each run can go
+    straight to the reviews page instead of searching for (Capterra) or
+    guessing (G2, TrustRadius) the product URL again.
+
+    "Not found" results are cached too, for a shorter negative_ttl, so a
+    missing product doesn't cost a search on every run. SQLite-backed, so
+    batch worker processes share one file.
+    """
+
+    def __init__(self, path: str = "resolutions.db", ttl: float = 30 * 24 * 3600,
+                 negative_ttl: float = 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _company(company: str) -> str:
+        return " ".join(company.split()).lower()
+
+    def lookup(self, source: str, company: str):
+        """Cached product URL, NOT_FOUND, or None when nothing (unexpired) is cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, resolved_at FROM resolutions WHERE source = ? AND company = ?",
+                (source, self._company(company))).fetchone()
+        if row is None:
+            return None
+        url, resolved_at = row
+        if time.time() - resolved_at > (self.ttl if url else self.negative_ttl):
+            return None
+        return url or NOT_FOUND
+
+    def remember(self, source: str, company: str, url: Optional[str]):
+        """Records the resolved product URL, or None for "no such product"."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resolutions (source, company, url, resolved_at) VALUES (?, ?, ?, ?)",
+                (source, self._company(company), url, time.time()))
+
+    def invalidate(self, source: Optional[str] = None, company: Optional[str] = None):
+        """Forgets cached resolutions, narrowed to a source and/or company when given."""
+        query, clauses, params = "DELETE FROM resolutions", [], []
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if company:
+            clauses.append("company = ?")
+            params.append(self._company(company))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock, self._conn:
+            self._conn.execute(query, params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import re
+import sys
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from dates import is_relative
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Shared encoder: json.dumps(..., ensure_ascii=False) would build a new one per call
+_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def _normalize(text: Any) -> str:
+    return _WHITESPACE.sub(" ", str(text or "")).strip().lower()
+
+
+def _fingerprint(source: Any, title: Any, date: Any, description: Any) -> str:
+    body_hash = hashlib.sha1(_normalize(description).encode('utf-8')).hexdigest()
+    key = "\x1f".join([_normalize(source), _normalize(title), _normalize(date), body_hash])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class Review:
+    """
+    One scraped review. Slotted, so millions of them cost a fraction of the
+    equivalent dicts. Source names are interned (every review of a source
+    shares one string) and the fingerprint is computed once on first use.
+    `dt` is the normalized date used for filtering; it is never serialized.
+    """
+
+    __slots__ = ("source", "title", "description", "date", "rating", "_dt", "_fingerprint")
+
+    def __init__(self, source: str, title: str, description: str, date: str,
+                 rating: Optional[float] = None, dt: Optional[datetime] = None):
+        self.source = sys.intern(source)
+        self.title = title
+        self.description = description
+        self.date = date
+        self.rating = rating
+        self._fingerprint = None
+        self._dt = dt
+
+    @property
+    def dt(self) -> Optional[datetime]:
+        return self._dt
+
+    @dt.setter
+    def dt(self, value: Optional[datetime]):
+        self._dt = value
+        # The fingerprint depends on the normalized date
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Stable id: normalized source + title + date plus a hash of the
+        normalized body. Whitespace and case changes don't alter it. The
+        date is the normalized day when known, so different display formats
+        of one day give the same id. Relative dates ("2 months ago") are left
+        out: they resolve to a different day on every run.
+        """
+        if self._fingerprint is None:
+            if self.date and is_relative(self.date):
+                date = ""
+            else:
+                date = self._dt.date().isoformat() if self._dt is not None else self.date
+            self._fingerprint = _fingerprint(self.source, self.title, date, self.description)
+        return self._fingerprint
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The public fields, in output order."""
+        return {
+            "source": self.source,
+            "title": self.title,
+            "description": self.description,
+            "date": self.date,
+            "rating": self.rating,
+        }
+
+    def to_json(self) -> str:
+        """Compact single-line JSON, as written to NDJSON."""
+        return _ENCODER.encode(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], dt: Optional[datetime] = None) -> "Review":
+        return cls(data.get("source") or "", data.get("title") or "", data.get("description") or "",
+                   data.get("date") or "", data.get("rating"), dt)
+
+    def __repr__(self):
+        return f"Review(source={self.source!r}, title={self.title!r}, date={self.date!r})"
+
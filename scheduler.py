@@ -0,0 +1,309 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from http_fetch import HttpResponse
+from metrics import get_metrics
+
+# Status codes that mean "slow down" rather than "not found"
+THROTTLE_STATUSES = {429, 503}
+
+# Page titles served by Cloudflare-style interstitials
+CHALLENGE_TITLES = ("Just a moment", "Attention Required", "Checking your browser")
+
+# True once the page shows different review cards than the snapshot taken
+# before the click: a new URL with cards on it, a different card count, or a
+# different first card (same-size page swapped in place).
+CARDS_CHANGED_JS = """([sel, url, count, first]) => {
+    const cards = document.querySelectorAll(sel);
+    if (location.href !== url) return cards.length > 0;
+    const head = cards.length ? cards[0].textContent.slice(0, 200) : "";
+    return cards.length !== count || head !== first;
+}"""
+
+CARDS_SNAPSHOT_JS = """(sel) => {
+    const cards = document.querySelectorAll(sel);
+    return [cards.length, cards.length ? cards[0].textContent.slice(0, 200) : ""];
+}"""
+
+
+class PageLoadError(Exception):
+    """A page could not be loaded (still a challenge, or an error page), as opposed to having no reviews."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class DomainScheduler:
+    """
+    Politeness and readiness for one host. Every navigation or pagination
+    click takes a token from the host's bucket, and pages are considered
+    loaded when review markup shows up rather than after fixed sleeps or
+    `networkidle` (which never settles on pages with analytics beacons).
+
+    Throttling (429/503) and challenge pages add an exponential penalty
+    that is slept before the next request and decays on each success.
+
+    Sharded crawls also take one of the host's `max_concurrent` slots per
+    page load, capping how many browsers work on the host at once. Their
+    loads still draw from the same bucket, so `rate` bounds a host's
+    throughput however many shards are used.
+    """
+
+    def __init__(self, domain: str, rate: float = 0.5, burst: float = 2,
+                 max_retries: int = 3, base_backoff: float = 5.0, max_backoff: float = 120.0,
+                 max_concurrent: int = 4):
+        self.domain = domain
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.penalty = 0.0
+        self._lock = threading.Lock()
+
+    def _throttled(self):
+        with self._lock:
+            self.penalty = min(self.max_backoff, self.penalty * 2 if self.penalty else self.base_backoff)
+            penalty = self.penalty
+        # Jitter so parallel workers don't retry in lockstep
+        time.sleep(penalty * random.uniform(1.0, 1.5))
+
+    def _succeeded(self):
+        with self._lock:
+            self.penalty = self.penalty / 2 if self.penalty > 1 else 0.0
+
+    def set_max_concurrent(self, limit: int):
+        """Changes the host's concurrency cap (call before crawling starts)."""
+        self.max_concurrent = max(1, limit)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+
+    def set_rate(self, rate: float):
+        """Changes the host's sustained request rate (call before crawling starts)."""
+        self.bucket = TokenBucket(rate, self.bucket.capacity)
+
+    @contextmanager
+    def slot(self):
+        """Holds one of the host's concurrent page-load slots."""
+        with self._slots:
+            yield
+
+    def wait_turn(self):
+        """Blocks until this host may be sent another request."""
+        with self._lock:
+            penalty = self.penalty
+        if penalty:
+            time.sleep(penalty)
+        self.bucket.acquire()
+
+    @staticmethod
+    def is_challenge(page, response=None) -> bool:
+        if response is not None and response.status in THROTTLE_STATUSES:
+            return True
+        try:
+            title = page.title()
+        except Exception:
+            return False
+        return any(marker in title for marker in CHALLENGE_TITLES)
+
+    def navigate(self, page, url: str, ready_selector: Optional[str] = None, timeout: int = 60000):
+        """
+        Rate-limited page.goto that returns once the DOM is parsed (and
+        ready_selector is present, if given). Retries with adaptive backoff
+        on throttling or challenge pages, and raises PageLoadError if the
+        page is still one after the last retry. Returns the response, which
+        callers check for error statuses such as 404.
+        """
+        metrics = get_metrics()
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.inc("retries", self.domain)
+            self.wait_turn()
+            # Latency excludes the politeness wait above
+            started = time.perf_counter()
+            response = page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+            if self.is_challenge(page, response):
+                metrics.inc("challenges", self.domain)
+                # Challenge pages often resolve by themselves; give the review
+                # markup a chance to appear before counting it as a failure.
+                if ready_selector and self.wait_for_selector(page, ready_selector, timeout=15000):
+                    metrics.observe("page_load_seconds", self.domain, time.perf_counter() - started)
+                    self._succeeded()
+                    return response
+                print(f"[{self.domain}] Throttled or challenged (attempt {attempt + 1}); backing off...")
+                self._throttled()
+                continue
+            self._succeeded()
+            if ready_selector:
+                self.wait_for_selector(page, ready_selector, timeout=15000)
+            metrics.observe("page_load_seconds", self.domain, time.perf_counter() - started)
+            return response
+        raise PageLoadError(f"{url} is still a challenge page after {self.max_retries + 1} attempts")
+
+    def click_and_wait(self, page, selector: str, card_selector: str, timeout: int = 30000) -> bool:
+        """
+        Rate-limited click on the pagination control matching selector. Waits
+        until the review cards change (new URL, new count, or different first
+        card). Returns False if nothing changed within the timeout.
+
+        If the click led to a challenge page instead, backs off and retries:
+        the page the control is on is re-opened through navigate() and the
+        control clicked again. Raises PageLoadError when the retries run out,
+        or when the challenge replaced a page that only exists in this DOM
+        (pagination that keeps the URL, which re-opening would restart).
+        """
+        url = page.url
+        metrics = get_metrics()
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.inc("retries", self.domain)
+                self.navigate(page, url, ready_selector=card_selector)
+            element = page.query_selector(selector)
+            if element is None:
+                raise PageLoadError(f"{selector} is missing after re-opening {url}")
+            count, first = page.evaluate(CARDS_SNAPSHOT_JS, card_selector)
+            self.wait_turn()
+            started = time.perf_counter()
+            element.click()
+            changed = self._wait_for_cards(page, card_selector, url, count, first, timeout)
+            challenged = self.is_challenge(page)
+            if changed:
+                metrics.observe("page_load_seconds", self.domain, time.perf_counter() - started)
+                if challenged:
+                    metrics.inc("challenges", self.domain)
+                    self._throttled()
+                else:
+                    self._succeeded()
+                return True
+            if not challenged:
+                return False
+            metrics.inc("challenges", self.domain)
+            print(f"[{self.domain}] Throttled or challenged after click (attempt {attempt + 1}); backing off...")
+            self._throttled()
+            if page.url == url:
+                raise PageLoadError(f"{url} was replaced by a challenge page; its position can't be re-opened")
+        raise PageLoadError(f"Next page after {url} is still a challenge page after retries")
+
+    @staticmethod
+    def _wait_for_cards(page, card_selector: str, url: str, count: int, first: str, timeout: int) -> bool:
+        """Waits until the cards differ from the (count, first) snapshot taken at url."""
+        deadline = time.monotonic() + timeout / 1000
+        while True:
+            remaining = int((deadline - time.monotonic()) * 1000)
+            if remaining <= 0:
+                return False
+            try:
+                page.wait_for_function(CARDS_CHANGED_JS, arg=[card_selector, url, count, first], timeout=remaining)
+                return True
+            except PlaywrightTimeoutError:
+                return False
+            except Exception:
+                # Execution context destroyed by a full navigation - try again on the new document
+                try:
+                    page.wait_for_load_state("domcontentloaded", timeout=max(remaining, 1))
+                except Exception:
+                    return False
+
+    def fetch(self, page, url: str, timeout: int = 30000):
+        """
+        Rate-limited plain HTTP GET through the page's browser context (same
+        cookies, nothing rendered). Returns an HttpResponse (body and bytes
+        received), or None on errors, throttling or a challenge page so the
+        caller can load the URL in the browser instead.
+        """
+        metrics = get_metrics()
+        self.wait_turn()
+        started = time.perf_counter()
+        try:
+            response = page.request.get(url, timeout=timeout)
+            if response.status in THROTTLE_STATUSES:
+                metrics.inc("challenges", self.domain)
+                self._throttled()
+                return None
+            if not response.ok:
+                return None
+            raw = response.body()
+            # What response.text() returns, without fetching the body twice
+            body = raw.decode()
+            # Wire size like the browser's own count; the decoded body if there is no Content-Length
+            size = int(response.headers.get("content-length") or len(raw))
+        except Exception as e:
+            print(f"[{self.domain}] Request for {url} failed: {e}")
+            return None
+        if any(f"<title>{marker}" in body for marker in CHALLENGE_TITLES):
+            metrics.inc("challenges", self.domain)
+            self._throttled()
+            return None
+        metrics.observe("page_load_seconds", self.domain, time.perf_counter() - started)
+        self._succeeded()
+        return HttpResponse(response.status, body, size)
+
+    def fetch_http(self, fetcher, url: str, cache=None):
+        """
+        Rate-limited GET through an HttpFetcher (no browser at all). Returns
+        the HttpResponse, or None on errors, throttling or a challenge page
+        so the caller can fall back to the browser.
+        """
+        metrics = get_metrics()
+        self.wait_turn()
+        started = time.perf_counter()
+        try:
+            response = fetcher.get(url, cache)
+        except Exception as e:
+            print(f"[{self.domain}] HTTP request for {url} failed: {e}")
+            return None
+        if response.status in THROTTLE_STATUSES or any(f"<title>{marker}" in response.text
+                                                        for marker in CHALLENGE_TITLES):
+            metrics.inc("challenges", self.domain)
+            self._throttled()
+            return None
+        metrics.observe("page_load_seconds", self.domain, time.perf_counter() - started)
+        if response.not_modified:
+            metrics.inc("not_modified", self.domain)
+        self._succeeded()
+        return response
+
+    @staticmethod
+    def wait_for_selector(page, selector: str, timeout: int = 15000) -> bool:
+        try:
+            page.wait_for_selector(selector, timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+
+_schedulers: Dict[str, DomainScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(domain: str) -> DomainScheduler:
+    """Process-wide scheduler for a host, shared by every scraper and thread."""
+    with _schedulers_lock:
+        if domain not in _schedulers:
+            _schedulers[domain] = DomainScheduler(domain)
+        return _schedulers[domain]
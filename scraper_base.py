@@ -1,38 +1,874 @@
+import asyncio
+import os
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Optional, Iterator, Callable, Set, Tuple
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode, urljoin
+
+from browser_pool import BrowserPool, current_thread_pool
+from checkpoint import Checkpoint, CheckpointStore
+from dates import get_normalizer
+from extraction import SelectorSpec, HtmlParser, count_cards, extract_reviews, get_parser
+from metrics import Metrics, get_metrics
+from scheduler import DomainScheduler, PageLoadError, get_scheduler
+from store import ReviewStore
+from page_cache import PageCache
+from resolution_cache import ResolutionCache, NOT_FOUND
+from structured import ResponseCapture, extract_json_ld_reviews
+from sharding import ShardedCrawl, get_shard_executor, page_number, last_page_number, page_links
+from pipeline import PageSnapshot, ParsePipeline
+from http_fetch import get_http_fetcher
+from review import Review
+
+class DedupIndex:
+    """
+    Hash set of review fingerprints. With a path, fingerprints are loaded at
+    start-up and new ones appended on save(), so later runs skip reviews that
+    were already collected. Safe to share between scraper threads.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._seen = set()
+        self._pending = []
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._seen.update(line.strip() for line in f if line.strip())
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, review: Review) -> bool:
+        return review.fingerprint in self._seen
+
+    def add_fingerprints(self, fingerprints: List[str]):
+        """Marks fingerprints as seen without re-saving them (e.g. from a checkpoint)."""
+        with self._lock:
+            self._seen.update(fingerprints)
+
+    def add(self, review: Review) -> bool:
+        """Records the review. Returns False if it was already in the index."""
+        fingerprint = review.fingerprint
+        with self._lock:
+            if fingerprint in self._seen:
+                return False
+            self._seen.add(fingerprint)
+            self._pending.append(fingerprint)
+        return True
+
+    def save(self):
+        """Appends fingerprints added since the last save to the index file."""
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            with open(self.path, "a", encoding='utf-8') as f:
+                f.write("\n".join(pending) + "\n")
+
+
+def with_query(url: str, params: Dict[str, str]) -> str:
+    """Returns url with the given query parameters added (or replaced)."""
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query))
+    query.update(params)
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+class SortedCrawlTracker:
+    """
+    Decides when a newest-first crawl can stop. Feed it the dates of every
+    review on each page (in page order); once a whole page is older than
+    start_date it says stop. If any review is newer than the one before it,
+    the ordering isn't what we asked for and it falls back to a full crawl.
+    In incremental mode, reaching a review that is already stored also ends
+    the crawl, since everything after it was collected by an earlier run.
+    """
+
+    def __init__(self, start_date: datetime, enabled: bool = True, known: Optional[Set[str]] = None):
+        self.start_date = start_date
+        self.enabled = enabled
+        self.known = known or set()
+        self.last_date = None
+        self.dated_seen = 0
+
+    def page_is_past_window(self, dates: List[Optional[datetime]]) -> bool:
+        if not self.enabled:
+            return False
+        dates = [d for d in dates if d]
+        for d in dates:
+            if self.last_date and d > self.last_date:
+                print("Reviews are not sorted newest first; falling back to full crawl.")
+                self.enabled = False
+                return False
+            self.last_date = d
+            self.dated_seen += 1
+        # Two dated reviews are the minimum to have seen the ordering at all
+        return bool(dates) and self.dated_seen >= 2 and all(d < self.start_date for d in dates)
+
+    def page_has_known(self, reviews: List[Review]) -> bool:
+        """True if a newest-first page contains a review stored by an earlier run."""
+        if not (self.enabled and self.known):
+            return False
+        return any(r.fingerprint in self.known for r in reviews)
+
 
 class ReviewScraper(ABC):
-    def __init__(self, headless: bool = True):
+    # Host the scraper talks to; the async engine limits concurrency per domain.
+    domain = ""
+    # Scheme + host all URLs are built from (overridable, e.g. for the fixture server)
+    base_url = ""
+    # Query parameters that ask the site for newest-first ordering
+    sort_params: Dict[str, str] = {}
+    # Fast mode allowlist: hosts (and subdomains) needed to render review markup
+    allowed_hosts: tuple = ()
+    # Where each review field lives in the page markup
+    selectors: Optional[SelectorSpec] = None
+    # Whether reviews without a parsable date are emitted (G2 drops them)
+    keep_undated: bool = True
+    # Structured mode: XHR/fetch JSON responses whose URL contains one of these carry review lists
+    api_url_keywords: tuple = ("review",)
+    # Query parameter selecting a numbered review page; sources that have one can be crawled sharded
+    page_param: str = ""
+    # Review pages are server-rendered, so HTTP fetch mode can read them without a browser
+    http_capable: bool = False
+
+    def __init__(self, headless: bool = True, pool: Optional[BrowserPool] = None,
+                 dedup: Optional[DedupIndex] = None, sort_newest_first: bool = True,
+                 fast: bool = False, parser: str = "auto",
+                 checkpoints: Optional[CheckpointStore] = None, resume: bool = False,
+                 store: Optional[ReviewStore] = None, incremental: bool = False,
+                 page_cache: Optional[PageCache] = None, resolutions: Optional[ResolutionCache] = None,
+                 structured: bool = False, shards: int = 1, parse_workers: int = 0, http: bool = False):
         self.headless = headless
+        # Shared browser pool injected by main.py. When absent, each fetch
+        # launches (and closes) its own browser as before.
+        self.pool = pool
+        # Reviews already collected (this run, or earlier runs if persisted)
+        self.dedup = dedup if dedup is not None else DedupIndex()
+        # Request newest-first ordering and stop once pages fall before start_date
+        self.sort_newest_first = sort_newest_first
+        # Block images, fonts, media and third-party hosts on every page load
+        self.fast = fast
+        # HTML backend for review extraction (selectolax/lxml when installed, else BeautifulSoup)
+        self.parser: HtmlParser = get_parser(parser)
+        # Per-page crawl progress; with resume=True a crawl continues from the last checkpoint
+        self.checkpoints = checkpoints
+        self.resume = resume
+        # Local review database; incremental=True only fetches reviews newer than what it holds
+        self.store = store
+        self.incremental = incremental
+        # Raw HTML of every parsed page, for re-extraction without a browser (see iter_replay_pages)
+        self.page_cache = page_cache
+        # Company -> product URL lookups from earlier runs (saves the search/guessing page loads)
+        self.resolutions = resolutions
+        # Read reviews from API payloads / JSON-LD when the page has them, CSS selectors otherwise
+        self.structured = structured
+        # Browsers loading numbered pages in parallel (1 = follow "Next" links one page at a time)
+        self.shards = shards
+        # Threads parsing pages while the browser loads the next one (0 = parse inline)
+        self.parse_workers = parse_workers
+        # Fetch pages with a plain pooled HTTP client, falling back to the browser where that fails
+        self.http = http
+
+    @property
+    def scheduler(self) -> DomainScheduler:
+        """Rate limiter and readiness waits shared by everything scraping this domain."""
+        return get_scheduler(self.domain)
+
+    @property
+    def metrics(self) -> Metrics:
+        """Process-wide timings and counters; this scraper reports under its domain."""
+        return get_metrics()
+
+    def page_content(self, page) -> str:
+        """page.content(), timed (serializing a large DOM is not free)."""
+        with self.metrics.timer("content_seconds", self.domain):
+            return page.content()
+
+    def record_page(self, company_name: str, url: str, extracted: List[Review], kept: List[Review],
+                    bytes_received: int = 0, parse_seconds: Optional[float] = None,
+                    load_seconds: Optional[float] = None, content_seconds: Optional[float] = None):
+        """Counts one processed page (or batch) and writes its structured log line."""
+        self.metrics.record_page(self.domain, self.selectors.source, company_name, url,
+                                 len(extracted), len(kept), bytes_received, parse_seconds,
+                                 load_seconds, content_seconds)
+
+    def sorted_url(self, url: str) -> str:
+        """Adds the site's newest-first sort parameters when sorted crawling is on."""
+        if self.sort_newest_first and self.sort_params:
+            return with_query(url, self.sort_params)
+        return url
+
+    def crawl_tracker(self, start_date: datetime, known: Optional[Set[str]] = None) -> SortedCrawlTracker:
+        return SortedCrawlTracker(start_date, enabled=self.sort_newest_first, known=known)
+
+    def incremental_window(self, company_name: str, start_date: datetime) -> Tuple[datetime, Set[str]]:
+        """
+        Effective start date and known review fingerprints for an incremental
+        run: crawling starts at the newest stored review for this source and
+        product (never before start_date), and reviews already stored from
+        that day on are marked as seen so they aren't emitted again.
+        Outside incremental mode returns (start_date, empty set).
+        """
+        if not (self.incremental and self.store is not None):
+            return start_date, set()
+        source = self.selectors.source
+        latest = self.store.latest_date(source, company_name)
+        if latest is None or latest <= start_date:
+            return start_date, set()
+        known = self.store.fingerprints(source, company_name, since=latest)
+        self.dedup.add_fingerprints(known)
+        print(f"[{self.__class__.__name__}] Incremental: newest stored review is from {latest.date()}; "
+              f"skipping older history.")
+        return latest, known
+
+    def open_checkpoint(self, company_name: str) -> Optional[Checkpoint]:
+        """
+        Returns the checkpoint to record this crawl in. When resuming, the
+        previous checkpoint is returned and its emitted reviews are marked as
+        seen so they aren't emitted twice; otherwise a fresh one is started.
+        """
+        if self.checkpoints is None:
+            return None
+        source = self.selectors.source
+        checkpoint = self.checkpoints.load(source, company_name) if self.resume else None
+        if checkpoint is not None:
+            self.dedup.add_fingerprints(checkpoint.emitted)
+            print(f"[{self.__class__.__name__}] Resuming after {checkpoint.pages} pages "
+                  f"({len(checkpoint.emitted)} reviews already emitted)")
+            return checkpoint
+        checkpoint = Checkpoint(source, company_name)
+        self.checkpoints.start(checkpoint)
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint: Optional[Checkpoint], cursor: Optional[str],
+                        reviews: List[Review], cards_processed: Optional[int] = None):
+        """Records a finished page: where to continue from and the reviews it emitted."""
+        if checkpoint is None:
+            return
+        checkpoint.cursor = cursor or checkpoint.cursor
+        if cards_processed is not None:
+            checkpoint.cards_processed = cards_processed
+        checkpoint.pages += 1
+        self.checkpoints.save(checkpoint, [r.fingerprint for r in reviews])
+
+    def finish_checkpoint(self, checkpoint: Optional[Checkpoint]):
+        """The crawl ran to completion; nothing left to resume."""
+        if checkpoint is not None:
+            self.checkpoints.clear(checkpoint.source, checkpoint.company)
+
+    def cached_resolution(self, company_name: str):
+        """Product URL resolved by an earlier run, NOT_FOUND, or None if unknown."""
+        if self.resolutions is None:
+            return None
+        cached = self.resolutions.lookup(self.selectors.source, company_name)
+        # Ignore entries resolved against another host (e.g. the fixture server)
+        if isinstance(cached, str) and not cached.startswith(self.base_url):
+            return None
+        return cached
+
+    def remember_resolution(self, company_name: str, url: Optional[str]):
+        """Caches the product URL for company_name, or None when the site has no such product."""
+        if self.resolutions is not None:
+            self.resolutions.remember(self.selectors.source, company_name, url)
+
+    def loaded_ok(self, page, response) -> bool:
+        """Whether a navigation ended on a real page (not an error status or a challenge), so its outcome can be cached."""
+        return (response is not None and response.status < 400
+                and not self.scheduler.is_challenge(page, response))
+
+    def forget_resolution(self, company_name: str):
+        if self.resolutions is not None:
+            self.resolutions.invalidate(self.selectors.source, company_name)
+
+    def extract_reviews(self, html: str) -> List[Review]:
+        """Extracts every review in html using this source's selector spec."""
+        return extract_reviews(html, self.selectors, self.parser)
+
+    def response_capture(self, page) -> Optional[ResponseCapture]:
+        """Starts capturing review API responses on page in structured mode."""
+        if not self.structured:
+            return None
+        capture = ResponseCapture(self.api_url_keywords)
+        capture.attach(page)
+        return capture
+
+    def count_cards(self, html: str) -> int:
+        """Review cards in html, counted with the first card selector that matches (without parsing when it can)."""
+        return count_cards(html, self.selectors, self.parser)
+
+    def extract_page_reviews(self, html: str, capture: Optional[ResponseCapture] = None) -> List[Review]:
+        """
+        Reviews on a loaded page. In structured mode, captured API payloads
+        and then embedded JSON-LD are used when they contain at least as many
+        reviews as the page has cards (a page may mark up only a featured
+        review); CSS selector extraction is the fallback.
+        """
+        with self.metrics.timer("parse_seconds", self.domain):
+            if self.structured:
+                reviews = capture.drain(self.selectors) if capture is not None else []
+                if not reviews:
+                    reviews = extract_json_ld_reviews(html, self.selectors)
+                if reviews and len(reviews) >= self.count_cards(html):
+                    return reviews
+            return self.extract_reviews(html)
+
+    def next_page_url(self, html: str, current_url: str, selectors: List[str]) -> Optional[str]:
+        """Absolute href of the first matching "next page" link in html, if any."""
+        doc = self.parser.parse(html)
+        for css in selectors:
+            link = self.parser.select_one(doc, css)
+            href = self.parser.attr(link, "href") if link is not None else None
+            if href and not href.startswith(("#", "javascript:")):
+                return urljoin(current_url, href)
+        return None
+
+    def select_page_reviews(self, reviews: List[Review], start_date: datetime, end_date: datetime) -> List[Review]:
+        """A page's reviews that are inside the date window and not seen before (undated per keep_undated)."""
+        kept = []
+        for review in reviews:
+            review_date = review.dt
+            if review_date is None and not self.keep_undated:
+                continue
+            if review_date and not (start_date <= review_date <= end_date):
+                continue
+            if self.dedup.add(review):
+                kept.append(review)
+        return kept
+
+    def can_shard(self) -> bool:
+        return self.shards > 1 and bool(self.page_param)
+
+    def load_shard(self, page, url: str, ready_selector: str) -> Optional[str]:
+        """
+        Loads one numbered page in a shard worker. Returns its HTML, or None if
+        it has no reviews; raises PageLoadError if it is still a challenge
+        after the scheduler's retries, or an error page.
+        """
+        with self.scheduler.slot():
+            response = self.scheduler.navigate(page, url, ready_selector=ready_selector)
+        if response is not None and response.status == 404:
+            return None
+        if page.query_selector(ready_selector) is None:
+            if response is not None and response.status >= 400:
+                raise PageLoadError(f"{url} returned HTTP {response.status}")
+            return None
+        return self.page_content(page)
+
+    def iter_sharded_pages(self, company_name: str, current_url: str, html: str, ready_selector: str,
+                           tracker: SortedCrawlTracker, checkpoint: Optional[Checkpoint],
+                           start_date: datetime, end_date: datetime) -> Iterator[List[Review]]:
+        """
+        Crawls the pages after current_url (already processed) by page number,
+        spread over `shards` parallel browsers, yielding kept reviews in page
+        order. The last page comes from the pagination links in html; without
+        one, pages are requested until one comes back empty. Stops like the
+        serial crawl (start_date reached, known review found), and when a page
+        repeats the previous one (the site ignored the page parameter).
+        """
+        first = (page_number(current_url, self.page_param) or 1) + 1
+        last = last_page_number(page_links(html), self.page_param)
+        if last is not None and last < first:
+            return
+        threads = min(self.shards, self.scheduler.max_concurrent)
+        workers = threads if last is None else min(threads, last - first + 1)
+        pool = self.pool or current_thread_pool()
+        print(f"[{self.__class__.__name__}] Sharded crawl from page {first} to {last or 'the end'} "
+              f"on {workers} browsers")
+
+        # The shard threads and their browsers outlive this crawl (closed at exit by close_shard_executors)
+        executor = get_shard_executor(self.domain, threads, self.headless,
+                                      pool.max_pages_per_context if pool is not None else 50)
+        crawl = ShardedCrawl(
+            load_page=lambda page, url: self.load_shard(page, url, ready_selector),
+            url_for=lambda n: with_query(current_url, {self.page_param: str(n)}),
+            first=first, last=last, workers=workers, executor=executor,
+            allowed_hosts=self.session_allowed_hosts())
+        # Compared with this crawl's previous page only: the dedup index also
+        # holds reviews from checkpoints and earlier runs
+        previous = {r.fingerprint for r in self.extract_page_reviews(html)}
+        try:
+            for n, url, page_html, bytes_received, load_seconds, content_seconds in crawl.start():
+                self.cache_page(company_name, url, n - 1, page_html)
+                page_reviews = self.extract_page_reviews(page_html)
+                print(f"Found {len(page_reviews)} reviews on page {n}.")
+                fingerprints = {r.fingerprint for r in page_reviews}
+                repeated = bool(fingerprints) and fingerprints <= previous
+                previous = fingerprints
+
+                kept = self.select_page_reviews(page_reviews, start_date, end_date)
+                # Loaded on a shard thread, so its timings come with the page
+                self.record_page(company_name, url, page_reviews, kept, bytes_received,
+                                 load_seconds=load_seconds, content_seconds=content_seconds)
+                if kept:
+                    yield kept
+                self.save_checkpoint(checkpoint, url, kept)
+
+                if tracker.page_is_past_window([r.dt for r in page_reviews]):
+                    print("Reached reviews older than start date; stopping.")
+                    break
+                if tracker.page_has_known(page_reviews):
+                    print("Reached reviews collected by an earlier run; stopping.")
+                    break
+                if repeated:
+                    print(f"Page {n} repeats reviews already seen; stopping.")
+                    break
+        finally:
+            crawl.stop()
+
+    def use_http(self) -> bool:
+        return self.http and self.http_capable
+
+    def iter_http_pages(self, company_name: str, url: str, next_selectors: List[str],
+                        tracker: SortedCrawlTracker, checkpoint: Optional[Checkpoint],
+                        start_date: datetime, end_date: datetime):
+        """
+        HTTP fetch mode: reads pages with the pooled HTTP client, following
+        "next" links (or the page parameter when there are none), and yields
+        kept reviews per page like the browser crawl. Returns None when the
+        crawl is complete, NOT_FOUND if the first page is a 404, or the URL
+        the browser should continue from when a page is a challenge, fails,
+        or has no review markup (i.e. needs JavaScript).
+        """
+        fetcher = get_http_fetcher()
+        if fetcher is None:
+            return url
+        seq = (page_number(url, self.page_param) or 1) - 1 if self.page_param else 0
+        # A page built from the page parameter rather than linked may simply not exist
+        linked = True
+        # Once the site has shown a "next" link, a page without one is the last
+        links_seen = False
+        # Reviews of the previous page fetched here, to catch a page parameter the site ignores
+        previous = set()
+        while url:
+            response = self.scheduler.fetch_http(fetcher, url, self.page_cache)
+            if response is not None and response.status == 404:
+                if seq == 0:
+                    return NOT_FOUND
+                return None if not linked else url
+            if response is None or response.status != 200:
+                return url
+            html = response.text
+            page_reviews = self.extract_page_reviews(html)
+            if not page_reviews:
+                if not linked:
+                    return None
+                print(f"No reviews in the HTTP response for {url}; continuing in the browser.")
+                return url
+
+            self.cache_page(company_name, url, seq, html)
+            print(f"Found {len(page_reviews)} reviews on this page.")
+            fingerprints = {r.fingerprint for r in page_reviews}
+            repeated = fingerprints <= previous
+            previous = fingerprints
+            kept = self.select_page_reviews(page_reviews, start_date, end_date)
+            self.record_page(company_name, url, page_reviews, kept, response.bytes_received)
+            if kept:
+                yield kept
+            self.save_checkpoint(checkpoint, url, kept)
+
+            if tracker.page_is_past_window([r.dt for r in page_reviews]):
+                print("Reached reviews older than start date; stopping.")
+                return None
+            if tracker.page_has_known(page_reviews):
+                print("Reached reviews collected by an earlier run; stopping.")
+                return None
+            if repeated:
+                print("Page repeats reviews already seen; stopping.")
+                return None
+
+            next_url = self.next_page_url(html, url, next_selectors)
+            linked = next_url is not None
+            links_seen = links_seen or linked
+            if next_url is None and self.page_param and not links_seen:
+                next_url = with_query(url, {self.page_param: str(seq + 2)})
+            url = next_url
+            seq += 1
+        return None
+
+    def pipelined(self) -> bool:
+        """
+        Whether pages are parsed on the pipeline's worker threads. Structured
+        mode reads captured responses, which only the browser thread may do,
+        and sharded crawls already overlap loading with parsing.
+        """
+        return self.parse_workers > 0 and not self.structured and not self.can_shard()
+
+    def click_next(self, session, page, selectors: List[str], card_selector: str):
+        """
+        Clicks the first visible, enabled "next page" control and waits for
+        new cards. Returns the page to continue on, or None if there is no
+        such control (the last page). Raises PageLoadError if the control is
+        there but the next page didn't load, so the crawl isn't recorded as
+        finished.
+        """
+        next_button = None
+        for css in selectors:
+            next_button = page.query_selector(css)
+            if next_button:
+                break
+        if not (next_button and next_button.is_visible() and next_button.is_enabled()):
+            return None
+        if not self.scheduler.click_and_wait(page, css, card_selector):
+            raise PageLoadError(f"Next page after {page.url} did not load new reviews")
+        return session.tick()
+
+    def iter_click_snapshots(self, session, page, seq: int, selectors: List[str],
+                             card_selector: str) -> Iterator[PageSnapshot]:
+        """
+        Browser side of a pipelined crawl: snapshots the current page, then
+        each page "next" leads to. Load failures are raised to the consumer.
+        """
+        while True:
+            yield PageSnapshot(page.url, seq, self.page_content(page), session.take_bytes())
+            page = self.click_next(session, page, selectors, card_selector)
+            if page is None:
+                return
+            seq += 1
+
+    def iter_pipelined_pages(self, company_name: str, snapshots: Iterator[PageSnapshot],
+                             tracker: SortedCrawlTracker, checkpoint: Optional[Checkpoint],
+                             start_date: datetime, end_date: datetime) -> Iterator[List[Review]]:
+        """
+        Consumes the browser's page snapshots, parsing them on parse_workers
+        threads while the browser loads further pages, and yields kept
+        reviews in page order. Stop decisions (start_date reached, known
+        review found) arrive a few pages late, so up to the pipeline's
+        capacity of extra pages may be loaded; their reviews are discarded.
+        """
+        exhausted = False
+        try:
+            with ParsePipeline(self.extract_page_reviews, self.parse_workers) as pipeline:
+                while True:
+                    if not (exhausted or pipeline.full()):
+                        snapshot = next(snapshots, None)
+                        if snapshot is None:
+                            exhausted = True
+                        else:
+                            self.cache_page(company_name, snapshot.url, snapshot.seq, snapshot.html)
+                            pipeline.submit(snapshot)
+                    if exhausted and not pipeline:
+                        break
+
+                    # Handle whatever has been parsed; block only when the browser must wait anyway
+                    stop = False
+                    for snapshot, page_reviews, seconds in pipeline.completed(wait=exhausted or pipeline.full()):
+                        print(f"Found {len(page_reviews)} reviews on this page.")
+                        kept = self.select_page_reviews(page_reviews, start_date, end_date)
+                        self.record_page(company_name, snapshot.url, page_reviews, kept,
+                                         snapshot.bytes_received, seconds)
+                        if kept:
+                            yield kept
+                        self.save_checkpoint(checkpoint, snapshot.url, kept, snapshot.cards_processed)
+
+                        if tracker.page_is_past_window([r.dt for r in page_reviews]):
+                            print("Reached reviews older than start date; stopping.")
+                            stop = True
+                        elif tracker.page_has_known(page_reviews):
+                            print("Reached reviews collected by an earlier run; stopping.")
+                            stop = True
+                        if stop:
+                            break
+                    if stop:
+                        break
+        finally:
+            snapshots.close()
+
+    def cache_page(self, company_name: str, url: str, seq: int, html: str):
+        """Keeps the HTML parsed at position seq of the crawl (page number or card offset)."""
+        if self.page_cache is not None:
+            self.page_cache.put(self.selectors.source, company_name, url, seq, html)
+
+    def iter_replay_pages(self, company_name: str, start_date: datetime, end_date: datetime) -> Iterator[List[Review]]:
+        """
+        Re-runs extraction over the cached pages of an earlier crawl, in crawl
+        order, applying the same date and duplicate filtering as a live crawl.
+        No browser is launched.
+        """
+        if self.page_cache is None:
+            raise ValueError("Replay needs a page cache")
+        for html in self.page_cache.iter_pages(self.selectors.source, company_name):
+            page_reviews = self.extract_page_reviews(html)
+            kept = self.select_page_reviews(page_reviews, start_date, end_date)
+            self.record_page(company_name, "replay", page_reviews, kept)
+            if kept:
+                yield kept
+
+    def reopen_page(self, page, url: str):
+        """Loads url on a recycled browser context, through the scheduler (rate limit, challenge backoff)."""
+        self.scheduler.navigate(page, url, ready_selector=self.selectors.card_selector)
+
+    def session_allowed_hosts(self) -> Optional[tuple]:
+        """Fast mode allowlist for new browser sessions (None outside fast mode)."""
+        return (self.allowed_hosts or (self.domain,)) if self.fast else None
+
+    @contextmanager
+    def browser_session(self):
+        """
+        Yields a BrowserSession (fresh context + page) from the shared pool,
+        the current worker thread's pool, or a temporary pool if neither exists.
+        """
+        allowed_hosts = self.session_allowed_hosts()
+        pool = self.pool or current_thread_pool()
+        if pool is not None:
+            with pool.session(allowed_hosts, self.reopen_page) as session:
+                yield session
+        else:
+            with BrowserPool(headless=self.headless) as pool:
+                with pool.session(allowed_hosts, self.reopen_page) as session:
+                    yield session
 
     @abstractmethod
-    def fetch_reviews(self, company_name: str, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+    def iter_review_pages(self, company_name: str, start_date: datetime, end_date: datetime) -> Iterator[List[Review]]:
+        """
+        Scrapes reviews for the given company within the specified date range,
+        yielding them one page (or "Show more" batch) at a time as they are
+        collected.
+
+        Args:
+            company_name: Name of the company/product.
+            start_date: Start date for the reviews.
+            end_date: End date for the reviews.
+
+        Yields:
+            Lists of Review records, one list per page.
+        """
+        pass
+
+    def fetch_reviews(self, company_name: str, start_date: datetime, end_date: datetime) -> List[Review]:
         """
         Fetches reviews for the given company within the specified date range.
-        
+
         Args:
             company_name: Name of the company/product.
             start_date: Start date for the reviews.
             end_date: End date for the reviews.
-            
+
         Returns:
-            A list of dictionaries, where each dictionary represents a review.
+            A list of Review records.
         """
-        pass
+        return [review for page in self.iter_review_pages(company_name, start_date, end_date) for review in page]
+
+    def stream_reviews(self, company_name: str, start_date: datetime, end_date: datetime,
+                       on_page: Callable[[List[Review]], None]) -> int:
+        """Scrapes page by page, passing each page to on_page. Returns the number of reviews seen."""
+        count = 0
+        for page in self.iter_review_pages(company_name, start_date, end_date):
+            on_page(page)
+            count += len(page)
+        return count
+
+    async def fetch_reviews_async(self, company_name: str, start_date: datetime, end_date: datetime,
+                                  executor: Optional[Executor] = None) -> List[Review]:
+        """
+        Async wrapper around fetch_reviews. The blocking scrape runs on the
+        given executor (normally the engine's browser worker threads) so the
+        event loop can drive several sources and companies at once.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.fetch_reviews, company_name, start_date, end_date)
+
+    async def stream_reviews_async(self, company_name: str, start_date: datetime, end_date: datetime,
+                                   on_page: Callable[[List[Review]], None],
+                                   executor: Optional[Executor] = None) -> int:
+        """Async wrapper around stream_reviews; on_page is called from the worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.stream_reviews, company_name, start_date, end_date, on_page)
 
-    def filter_reviews_by_date(self, reviews: List[Dict[str, Any]], start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+    def filter_reviews_by_date(self, reviews: List[Review], start_date: datetime, end_date: datetime) -> List[Review]:
         """
         Helper method to filter a list of reviews by date.
-        Assumes each review has a 'date' field as a datetime object or parseable string.
+        Uses the normalized `dt` the extractors attach; reviews without it
+        (e.g. loaded from disk) have their date string parsed with this
+        source's formats. Undated reviews are kept only if the source keeps
+        them while scraping (keep_undated).
         """
+        missing = [r for r in reviews if r.dt is None and r.date]
+        if missing:
+            normalizer = get_normalizer(self.selectors.source, self.selectors.date_formats)
+            for review, dt in zip(missing, normalizer.parse_many([r.date for r in missing])):
+                review.dt = dt
+
         filtered = []
         for review in reviews:
-            review_date = review.get('date')
-            if isinstance(review_date, str):
-                # Try parsing if it's a string, this might need customization per source if formats vary wildly
-                pass 
-            
-            if review_date and start_date <= review_date <= end_date:
+            review_date = review.dt
+            if review_date is None:
+                if self.keep_undated:
+                    filtered.append(review)
+            elif start_date <= review_date <= end_date:
                 filtered.append(review)
         return filtered
+
+
+class PaginatedReviewScraper(ReviewScraper):
+    """
+    Sources whose reviews are split over pages linked by a "next page"
+    control (G2, TrustRadius). The product's reviews URL comes from the
+    resolution cache or is guessed from the company name; its pages are
+    read over HTTP, in the browser page by page, pipelined or sharded,
+    depending on the scraper's settings.
+    """
+
+    # Reviews URL relative to base_url; {slug} is the company name lowercased, spaces as dashes
+    reviews_path = "/products/{slug}/reviews"
+    # "Next page" controls, tried in order (a link's href lets pages be fetched directly)
+    next_selectors: tuple = ()
+
+    def guess_product_url(self, company_name: str) -> str:
+        # Note: company_name needs to be the slug.
+        return self.base_url + self.reviews_path.format(slug=company_name.lower().replace(' ', '-'))
+
+    def iter_review_pages(self, company_name: str, start_date: datetime, end_date: datetime) -> Iterator[List[Review]]:
+        source = self.selectors.source
+        card_selector = self.selectors.card_selector
+        next_selectors = list(self.next_selectors)
+        # Product URL from an earlier run, else guessed from the company name
+        product_url = self.cached_resolution(company_name)
+        if product_url is NOT_FOUND:
+            print(f"Product page not found for {company_name} (cached)")
+            return
+        guessed = product_url is None
+        if guessed:
+            product_url = self.guess_product_url(company_name)
+        url = self.sorted_url(product_url)
+
+        print(f"[{self.__class__.__name__}] Starting scrape for {company_name} from {url}")
+
+        # Resume from the last fully emitted page if a checkpoint exists.
+        # (If pagination doesn't change the URL this restarts from page 1 and
+        # the checkpointed ids keep already-emitted reviews out.)
+        checkpoint = self.open_checkpoint(company_name)
+        # Incremental runs start at the newest stored review and stop at the first known one
+        start_date, known = self.incremental_window(company_name, start_date)
+        if checkpoint is not None and checkpoint.cursor:
+            url = checkpoint.cursor
+        tracker = self.crawl_tracker(start_date, known)
+
+        # HTTP fetch mode: server-rendered pages are read without a browser, which
+        # only takes over from the first page that needs one
+        if self.use_http():
+            try:
+                resume_url = yield from self.iter_http_pages(company_name, url, next_selectors, tracker, checkpoint,
+                                                             start_date, end_date)
+            except Exception as e:
+                print(f"An error occurred during {source} scraping: {e}")
+                return
+            if resume_url is NOT_FOUND:
+                print(f"Product page not found for {company_name}")
+                self.remember_resolution(company_name, None)
+                return
+            if guessed and resume_url != url:
+                self.remember_resolution(company_name, product_url)
+                guessed = False
+            if resume_url is None:
+                self.finish_checkpoint(checkpoint)
+                return
+            url = resume_url
+
+        with self.browser_session() as session:
+            page = session.page
+
+            try:
+                # Waits for review markup; backs off and retries on Cloudflare/Bot checks
+                response = self.scheduler.navigate(page, url, ready_selector=card_selector)
+
+                # Check if page exists
+                if response is not None and response.status == 404:
+                    print(f"Product page not found for {company_name}")
+                    self.remember_resolution(company_name, None)
+                    return
+                if response is not None and response.status >= 400:
+                    raise PageLoadError(f"{url} returned HTTP {response.status}")
+                if guessed and self.loaded_ok(page, response):
+                    self.remember_resolution(company_name, product_url)
+
+                # Position in the crawl for the page cache (a resumed crawl restarts at its cursor page)
+                seq = max(checkpoint.pages - 1, 0) if checkpoint is not None and checkpoint.cursor else 0
+                # Structured mode: review API payloads the page loads are read directly
+                capture = self.response_capture(page)
+
+                if self.pipelined():
+                    # Pages are parsed on worker threads while the browser loads the next one
+                    snapshots = self.iter_click_snapshots(session, page, seq, next_selectors, card_selector)
+                    yield from self.iter_pipelined_pages(company_name, snapshots, tracker, checkpoint,
+                                                         start_date, end_date)
+                    self.finish_checkpoint(checkpoint)
+                    return
+
+                # current_url/html may run ahead of the browser when structured
+                # mode fetches pages with plain requests
+                current_url = page.url
+                html = self.page_content(page)
+                prefetched = None
+                # Plain requests never pass through the browser's response events
+                request_bytes = 0
+
+                while True:
+                    self.cache_page(company_name, current_url, seq, html)
+                    page_reviews = prefetched if prefetched else self.extract_page_reviews(html, capture)
+
+                    print(f"Found {len(page_reviews)} reviews on this page.")
+                    kept = self.select_page_reviews(page_reviews, start_date, end_date)
+                    self.record_page(company_name, current_url, page_reviews, kept,
+                                     session.take_bytes() + request_bytes)
+                    request_bytes = 0
+
+                    # Hand this page's reviews to the caller before loading the next one
+                    if kept:
+                        yield kept
+                    self.save_checkpoint(checkpoint, current_url, kept)
+
+                    # Sorted newest first: a page entirely before start_date means
+                    # every later page is too.
+                    if tracker.page_is_past_window([r.dt for r in page_reviews]):
+                        print("Reached reviews older than start date; stopping.")
+                        break
+                    if tracker.page_has_known(page_reviews):
+                        print("Reached reviews collected by an earlier run; stopping.")
+                        break
+
+                    # Sharded mode: the remaining numbered pages load in parallel browsers
+                    if self.can_shard():
+                        yield from self.iter_sharded_pages(company_name, current_url, html, card_selector,
+                                                           tracker, checkpoint, start_date, end_date)
+                        break
+
+                    # Structured mode paginates by request: the next page is fetched
+                    # without rendering and used as-is if its JSON-LD (or, failing that,
+                    # its server-rendered cards) holds the page's reviews.
+                    if self.structured:
+                        next_url = self.next_page_url(html, current_url, next_selectors)
+                        fetched = self.scheduler.fetch(page, next_url) if next_url else None
+                        request_bytes += fetched.bytes_received if fetched else 0
+                        prefetched = self.extract_page_reviews(fetched.text) if fetched else None
+                        if prefetched:
+                            current_url, html = next_url, fetched.text
+                            seq += 1
+                            continue
+                        if current_url != page.url:
+                            # Fall back to the browser, starting from the page we actually read
+                            self.scheduler.navigate(page, next_url or current_url, ready_selector=card_selector)
+                            if next_url:
+                                page = session.tick()
+                                capture.attach(page)
+                                current_url, html = page.url, self.page_content(page)
+                                seq += 1
+                                continue
+
+                    page = self.click_next(session, page, next_selectors, card_selector)
+                    if page is None:
+                        break
+                    if capture is not None:
+                        capture.attach(page)
+                    current_url, html = page.url, self.page_content(page)
+                    seq += 1
+
+            except Exception as e:
+                print(f"An error occurred during {source} scraping: {e}")
+            else:
+                self.finish_checkpoint(checkpoint)
@@ -0,0 +1,188 @@
+import re
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse, parse_qsl
+
+from browser_pool import current_thread_pool, install_thread_pool, shutdown_thread_pools
+from metrics import get_metrics
+
+# (page number, url, html or None when the page had no reviews, network bytes,
+#  load seconds, content seconds) - timings are the worker thread's for that page
+ShardResult = Tuple[int, str, Optional[str], int, Optional[float], Optional[float]]
+
+# How far (in pages) workers may run ahead of the page being consumed. Bounds
+# memory and the pages wasted when a newest-first crawl stops early.
+LOOKAHEAD_PER_WORKER = 2
+
+
+def page_number(url: str, param: str) -> Optional[int]:
+    """Value of the page query parameter in url, if it is a number."""
+    value = dict(parse_qsl(urlparse(url).query)).get(param)
+    return int(value) if value and value.isdigit() else None
+
+
+def last_page_number(hrefs: Sequence[str], param: str) -> Optional[int]:
+    """Highest page number linked from a pagination bar, or None if there are no numbered links."""
+    numbers = [page_number(href, param) for href in hrefs]
+    numbers = [n for n in numbers if n is not None]
+    return max(numbers) if numbers else None
+
+
+def page_links(html: str) -> List[str]:
+    """Every href in html (cheap regex scan; only query strings are inspected)."""
+    return re.findall(r'href=["\']([^"\']+)["\']', html)
+
+
+class ShardedCrawl:
+    """
+    Loads the numbered pages of one product in parallel. Workers run on an
+    executor whose threads each own a browser (see get_shard_executor;
+    Playwright's sync API is bound to its thread) and claim page numbers in
+    increasing order; iterating yields the pages in page order regardless
+    of which worker finished first.
+
+    Without a known last page the crawl is open-ended and ends at the first
+    page that has no reviews; with one, an empty page is skipped. A page
+    that fails to load (load_page raises, e.g. PageLoadError) stops the
+    crawl and is raised from the iteration. Workers never run more than a
+    few pages ahead of the consumer, and stopping iteration (e.g. a
+    newest-first crawl reaching start_date) stops the workers.
+    """
+
+    def __init__(self, load_page: Callable, url_for: Callable[[int], str], first: int,
+                 last: Optional[int], workers: int, executor: Executor,
+                 allowed_hosts: Optional[Sequence[str]] = None):
+        # load_page(page, url) -> html, or None if the page has no reviews; raises if it failed to load
+        self.load_page = load_page
+        self.url_for = url_for
+        self.first = first
+        self.last = last
+        self.workers = max(1, workers)
+        # Threads with a BrowserPool installed (install_thread_pool)
+        self.executor = executor
+        self.allowed_hosts = allowed_hosts
+        self.lookahead = self.workers * LOOKAHEAD_PER_WORKER
+        self._next_claim = first
+        # Lowest page number not consumed yet; workers may claim up to it + lookahead
+        self._consumed = first
+        # Open-ended crawls: no page past the first empty one is needed
+        self._end: Optional[int] = last
+        self._results: Dict[int, ShardResult] = {}
+        # (page number being loaded or None, exception) per failed worker
+        self._errors: List[Tuple[Optional[int], BaseException]] = []
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._futures: List[Future] = []
+
+    def _claim(self) -> Optional[int]:
+        with self._cond:
+            while True:
+                if self._stopped or self._errors:
+                    return None
+                if self._end is not None and self._next_claim > self._end:
+                    return None
+                if self._next_claim < self._consumed + self.lookahead:
+                    n = self._next_claim
+                    self._next_claim += 1
+                    return n
+                self._cond.wait()
+
+    def _put(self, result: ShardResult):
+        n, html = result[0], result[2]
+        with self._cond:
+            self._results[n] = result
+            # Only an open-ended crawl learns where it ends from an empty page
+            if html is None and self.last is None and (self._end is None or n < self._end):
+                self._end = n
+            self._cond.notify_all()
+
+    def _worker(self):
+        metrics = get_metrics()
+        n = None
+        try:
+            # A fresh context on the thread's long-lived browser
+            with current_thread_pool().session(self.allowed_hosts) as session:
+                while True:
+                    n = self._claim()
+                    if n is None:
+                        break
+                    url = self.url_for(n)
+                    html = self.load_page(session.page, url)
+                    self._put((n, url, html, session.take_bytes(),
+                               metrics.last("page_load_seconds"), metrics.last("content_seconds")))
+                    n = None
+                    session.tick()
+        except BaseException as e:
+            with self._cond:
+                self._errors.append((n, e))
+                self._cond.notify_all()
+
+    def start(self):
+        self._futures = [self.executor.submit(self._worker) for _ in range(self.workers)]
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for future in self._futures:
+            # Workers still queued behind another crawl's never need to start
+            if not future.cancel():
+                future.result()
+
+    def __iter__(self) -> Iterator[ShardResult]:
+        n = self.first
+        try:
+            while True:
+                with self._cond:
+                    while n not in self._results:
+                        # Pages before a failed one are still delivered by the other workers
+                        failed = [e for m, e in self._errors if m is None or m <= n]
+                        if failed:
+                            raise failed[0]
+                        if self._end is not None and n > self._end:
+                            return
+                        self._cond.wait()
+                    result = self._results.pop(n)
+                    self._consumed = n + 1
+                    self._cond.notify_all()
+                if result[2] is None and self.last is None:
+                    # First empty page: the product has no more reviews
+                    return
+                if result[2] is not None:
+                    yield result
+                n += 1
+        finally:
+            self.stop()
+
+
+# Shard threads per host, kept for the whole process so their browsers are
+# launched once rather than on every sharded crawl: (executor, thread count)
+_executors: Dict[str, Tuple[ThreadPoolExecutor, int]] = {}
+_executors_lock = threading.Lock()
+
+
+def get_shard_executor(domain: str, workers: int, headless: bool = True,
+                       max_pages_per_context: int = 50) -> ThreadPoolExecutor:
+    """
+    Process-wide shard threads for a host, each with its own BrowserPool.
+    Sized by the first crawl; later crawls of the host use at most as many
+    workers (its concurrency cap), and concurrent ones queue for threads.
+    """
+    with _executors_lock:
+        if domain not in _executors:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"shard-{domain}",
+                                          initializer=install_thread_pool,
+                                          initargs=(headless, max_pages_per_context))
+            _executors[domain] = (executor, workers)
+        return _executors[domain][0]
+
+
+def close_shard_executors():
+    """Closes every shard thread's browser and stops the threads."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor, workers in executors:
+        shutdown_thread_pools(executor, workers)
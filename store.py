@@ -0,0 +1,108 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Set, Iterable
+
+from review import Review
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    fingerprint TEXT PRIMARY KEY,
+    source      TEXT NOT NULL,
+    product     TEXT NOT NULL,
+    review_date TEXT,
+    scraped_at  TEXT NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_date ON reviews (source, product, review_date);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_fingerprint ON reviews (source, product, fingerprint);
+"""
+
+
+def product_key(company: str) -> str:
+    """Products are matched case-insensitively, so "Slack" and "slack" share history."""
+    return " ".join(company.split()).lower()
+
+
+class ReviewStore:
+    """
+    Local SQLite database of every review scraped so far, keyed by review
+    fingerprint. Incremental runs read the newest stored date per (source,
+    product) from it to skip history that is already collected. Safe to share
+    between scraper threads; worker processes each open their own store.
+    """
+
+    def __init__(self, path: str = "reviews.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        # Several batch workers may write at once; wait for the lock instead of failing
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def add_reviews(self, company: str, reviews: List[Review]) -> int:
+        """Inserts reviews not already stored. Returns how many were new."""
+        now = datetime.now().isoformat()
+        product = product_key(company)
+        rows = [(r.fingerprint, r.source, product, r.dt.isoformat() if r.dt else None, now, r.to_json())
+                for r in reviews]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO reviews (fingerprint, source, product, review_date, scraped_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self._conn.total_changes - before
+
+    def latest_date(self, source: str, company: str) -> Optional[datetime]:
+        """Date of the newest stored review for (source, product), or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(review_date) FROM reviews WHERE source = ? AND product = ?",
+                (source, product_key(company))).fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def fingerprints(self, source: str, company: str, since: Optional[datetime] = None) -> Set[str]:
+        """Fingerprints stored for (source, product), optionally only those dated on or after since."""
+        query = "SELECT fingerprint FROM reviews WHERE source = ? AND product = ?"
+        params: list = [source, product_key(company)]
+        if since is not None:
+            query += " AND review_date >= ?"
+            params.append(since.isoformat())
+        with self._lock:
+            return {row[0] for row in self._conn.execute(query, params)}
+
+    def iter_reviews(self, source: Optional[str] = None, company: Optional[str] = None) -> Iterable[Review]:
+        """Stored reviews, newest first."""
+        query = "SELECT data, review_date FROM reviews"
+        clauses, params = [], []
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if company:
+            clauses.append("product = ?")
+            params.append(product_key(company))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY review_date DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for data, review_date in rows:
+            yield Review.from_dict(json.loads(data), datetime.fromisoformat(review_date) if review_date else None)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,147 @@
+import json
+import re
+from typing import List, Dict, Any, Optional, Sequence
+
+from dates import get_normalizer
+from extraction import SelectorSpec
+from review import Review
+
+# <script type="application/ld+json"> blocks, found without building a DOM
+JSON_LD_RE = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.I | re.S)
+
+# Candidate keys for each review field, in order of preference. Covers
+# schema.org Review objects as well as typical review API payloads.
+TITLE_KEYS = ("name", "headline", "title")
+BODY_KEYS = ("reviewBody", "body", "text", "comment", "comments", "description")
+DATE_KEYS = ("datePublished", "dateCreated", "publishedAt", "createdAt", "created_at", "submittedAt", "date")
+RATING_KEYS = ("reviewRating", "rating", "ratingValue", "overallRating", "overall_rating", "stars", "score")
+
+
+def _first_value(obj: Dict[str, Any], keys: Sequence[str]):
+    for key in keys:
+        value = obj.get(key)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        return "\n".join(_text(v) for v in value if v)
+    if isinstance(value, dict):
+        return _text(_first_value(value, ("text", "value", "@value", "name")))
+    return str(value or "").strip()
+
+
+def _rating(value) -> Optional[float]:
+    if isinstance(value, dict):
+        value = _first_value(value, ("ratingValue", "value", "score", "stars"))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_review(obj: Dict[str, Any]) -> bool:
+    types = obj.get("@type")
+    types = types if isinstance(types, list) else [types]
+    if "Review" in types:
+        return True
+    # Untyped API objects: anything with a body and a date
+    return "@type" not in obj and _first_value(obj, BODY_KEYS) is not None and _first_value(obj, DATE_KEYS) is not None
+
+
+def _review_from_json(obj: Dict[str, Any], spec: SelectorSpec) -> Review:
+    return Review(
+        spec.source,
+        _text(_first_value(obj, TITLE_KEYS)) or "No Title",
+        _text(_first_value(obj, BODY_KEYS)),
+        _text(_first_value(obj, DATE_KEYS)),
+        _rating(_first_value(obj, RATING_KEYS)),
+    )
+
+
+def extract_json_reviews(data: Any, spec: SelectorSpec) -> List[Review]:
+    """
+    Walks a decoded JSON document (JSON-LD graph or API response) and returns
+    every review-shaped object in document order, as the same Review records
+    the CSS extractor produces.
+    """
+    reviews = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            if _is_review(node):
+                reviews.append(_review_from_json(node, spec))
+            else:
+                stack.extend(reversed(list(node.values())))
+
+    # ISO 8601 normally; the source's display formats otherwise
+    dates = get_normalizer(spec.source, spec.date_formats).parse_many([r.date for r in reviews])
+    for review, dt in zip(reviews, dates):
+        review.dt = dt
+    return reviews
+
+
+def extract_json_ld_reviews(html: str, spec: SelectorSpec) -> List[Review]:
+    """Reviews embedded as JSON-LD in html. Malformed blocks are skipped."""
+    return extract_json_ld_blocks(JSON_LD_RE.findall(html), spec)
+
+
+def extract_json_ld_blocks(blocks: Sequence[str], spec: SelectorSpec) -> List[Review]:
+    """Reviews in already isolated JSON-LD script bodies (e.g. read from a live page)."""
+    reviews = []
+    for block in blocks:
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        reviews.extend(extract_json_reviews(data, spec))
+    return reviews
+
+
+class ResponseCapture:
+    """
+    Records the JSON responses a page receives from review APIs (XHR/fetch
+    requests whose URL contains one of `keywords`) so their reviews can be
+    read straight from the payload. Bodies are only read in drain(), outside
+    the Playwright event handler.
+    """
+
+    def __init__(self, keywords: Sequence[str] = ("review",)):
+        self.keywords = tuple(k.lower() for k in keywords)
+        self._page = None
+        self._responses = []
+
+    def attach(self, page):
+        """Starts listening on page (a no-op if already attached to it)."""
+        if page is self._page:
+            return
+        self._page = page
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+        except Exception:
+            return
+        if any(k in response.url.lower() for k in self.keywords):
+            self._responses.append(response)
+
+    def drain(self, spec: SelectorSpec) -> List[Review]:
+        """Reviews from every payload captured since the last drain."""
+        responses, self._responses = self._responses, []
+        reviews = []
+        for response in responses:
+            try:
+                data = response.json()
+            except Exception:
+                continue
+            reviews.extend(extract_json_reviews(data, spec))
+        return reviews
@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+import browser_pool
+from review import Review
+from scraper_base import SortedCrawlTracker
+from sharding import ShardedCrawl
+
+
+class FakeSession:
+    page = None
+
+    def take_bytes(self):
+        return 100
+
+    def tick(self):
+        return self.page
+
+
+class FakePool:
+    """Stands in for a thread's BrowserPool; no browser is launched."""
+
+    @contextmanager
+    def session(self, allowed_hosts=None):
+        yield FakeSession()
+
+
+def install_fake_pool():
+    browser_pool._thread_state.pool = FakePool()
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=4, initializer=install_fake_pool)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def crawl_pages(executor, pages, last=None, workers=4, delays=None):
+    """Runs a crawl over fake pages: pages[n] is the html of page n, missing ones are empty."""
+    def load_page(page, url):
+        n = int(url)
+        time.sleep((delays or {}).get(n, 0))
+        result = pages.get(n)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    crawl = ShardedCrawl(load_page, str, first=2, last=last, workers=workers, executor=executor)
+    return [(n, html) for n, _, html, *_ in crawl.start()]
+
+
+def test_pages_are_delivered_in_order(executor):
+    pages = {n: f"page {n}" for n in range(2, 10)}
+    # Early pages finish last
+    delays = {2: 0.05, 3: 0.03}
+    assert crawl_pages(executor, pages, last=9, delays=delays) == [(n, f"page {n}") for n in range(2, 10)]
+
+
+def test_open_ended_crawl_stops_at_first_empty_page(executor):
+    pages = {2: "page 2", 3: "page 3", 4: "page 4", 6: "page 6"}
+    assert crawl_pages(executor, pages) == [(2, "page 2"), (3, "page 3"), (4, "page 4")]
+
+
+def test_empty_page_is_skipped_when_last_page_is_known(executor):
+    pages = {2: "page 2", 4: "page 4"}
+    assert crawl_pages(executor, pages, last=4) == [(2, "page 2"), (4, "page 4")]
+
+
+def test_failed_page_is_raised_after_earlier_pages(executor):
+    pages = {2: "page 2", 3: "page 3", 4: RuntimeError("challenge"), 5: "page 5"}
+    delivered = []
+
+    def load_page(page, url):
+        result = pages[int(url)]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    crawl = ShardedCrawl(load_page, str, first=2, last=5, workers=2, executor=executor)
+    with pytest.raises(RuntimeError, match="challenge"):
+        for n, _, html, *_ in crawl.start():
+            delivered.append(n)
+    assert delivered == [2, 3]
+
+
+def test_stopping_early_stops_the_workers(executor):
+    loaded = []
+    lock = threading.Lock()
+
+    def load_page(page, url):
+        with lock:
+            loaded.append(int(url))
+        return f"page {url}"
+
+    crawl = ShardedCrawl(load_page, str, first=2, last=None, workers=2, executor=executor)
+    for n, *_ in crawl.start():
+        if n == 3:
+            break
+    # Workers only run a few pages ahead of the consumer
+    assert max(loaded) < 3 + crawl.lookahead + 1
+
+
+def make_review(title, dt):
+    return Review("G2", title, "body", dt.strftime("%Y-%m-%d"), dt=dt)
+
+
+def test_tracker_stops_once_a_page_is_before_start_date():
+    tracker = SortedCrawlTracker(datetime(2024, 1, 1))
+    assert not tracker.page_is_past_window([datetime(2024, 3, 1), datetime(2024, 2, 1)])
+    assert tracker.page_is_past_window([datetime(2023, 12, 1), datetime(2023, 11, 1)])
+
+
+def test_tracker_falls_back_to_full_crawl_when_unsorted():
+    tracker = SortedCrawlTracker(datetime(2024, 1, 1))
+    assert not tracker.page_is_past_window([datetime(2023, 6, 1), datetime(2023, 8, 1)])
+    assert not tracker.enabled
+    assert not tracker.page_is_past_window([datetime(2023, 1, 1), datetime(2022, 1, 1)])
+
+
+def test_tracker_needs_two_dated_reviews():
+    tracker = SortedCrawlTracker(datetime(2024, 1, 1))
+    assert not tracker.page_is_past_window([datetime(2023, 1, 1), None])
+
+
+def test_tracker_stops_at_a_known_review():
+    known = make_review("old", datetime(2024, 1, 5))
+    tracker = SortedCrawlTracker(datetime(2024, 1, 1), known={known.fingerprint})
+    assert not tracker.page_has_known([make_review("new", datetime(2024, 2, 1))])
+    assert tracker.page_has_known([make_review("new", datetime(2024, 2, 1)), known])
+    assert not SortedCrawlTracker(datetime(2024, 1, 1), enabled=False,
+                                  known={known.fingerprint}).page_has_known([known])